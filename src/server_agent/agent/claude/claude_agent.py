@@ -36,6 +36,16 @@ logger = logging.getLogger(__name__)
 IDLE_TTL_SECONDS = 30 * 60
 CLEANUP_INTERVAL_SECONDS = 60
 
+# Bash 命令里的技能识别正则，权限钩子每次调用都会用到，预先编译
+_HELP_FLAG_RE = re.compile(r"(?:^|\s)(?:--help|-h)(?:\s|$)")
+_SCRIPT_INVOKE_RE = re.compile(
+    r"(?:^|[;&|]\s*|\s)"
+    r"(?:\S*/)?(?:python[0-9.]*|bash|sh|perl|ruby|node)"
+    r"\s+(?:(?:-[^\s]+\s+)*)"
+    r"(?P<script>[^\s;&|]+?\.(?:py|sh))(?=\s|$)"
+)
+_SKILL_PATH_RE = re.compile(r"[/~][^\s]*?/\.claude/skills/([^/\s]+)")
+
 SYSTEM_PROMPT_TEMPLATE = """
 你是一个医学影像处理助手。
 
@@ -83,15 +93,15 @@ SYSTEM_PROMPT_TEMPLATE = """
 """.strip()
 
 
+# 患者数据根目录在进程内不变（in_data 还要做一次 resolve），提前代入模板，
+# 每次新建会话只需替换 user_id
+_SYSTEM_PROMPT_BASE = SYSTEM_PROMPT_TEMPLATE.replace("{patient_data_root}", str(in_data("patient")))
+
+
 def get_system_prompt(user_id: Optional[int] = None) -> str:
     """根据 user_id 生成 system prompt"""
     uid = str(user_id) if user_id is not None else "unknown"
-    patient_data_root = str(in_data("patient"))
-    return (
-        SYSTEM_PROMPT_TEMPLATE
-        .replace("{user_id}", uid)
-        .replace("{patient_data_root}", patient_data_root)
-    )
+    return _SYSTEM_PROMPT_BASE.replace("{user_id}", uid)
 
 class MessageKind:
     """消息类型常量 - 与参考项目一致"""
@@ -110,6 +120,13 @@ class MessageKind:
     STATUS = "status"
 
 
+# 流式 delta 类型 -> (消息类型, 内容字段)
+DELTA_DISPATCH = {
+    "text_delta": (MessageKind.STREAM_DELTA, "text"),
+    "thinking_delta": (MessageKind.THINKING, "thinking"),
+}
+
+
 class NormalizedMessage:
     """标准化消息格式 - 与参考项目一致"""
     def __init__(
@@ -294,10 +311,9 @@ class ClaudeAgent:
 
     def _detect_skill_from_bash_command(self, command: str) -> Optional[str]:
         """Return the skill whose executable script is actually invoked by a Bash command."""
-        import re
         import shlex
 
-        if not command or re.search(r"(?:^|\s)(?:--help|-h)(?:\s|$)", command):
+        if not command or _HELP_FLAG_RE.search(command):
             return None
 
         try:
@@ -325,18 +341,12 @@ class ClaudeAgent:
         # Match interpreter-backed entrypoints such as:
         #   python /.../.claude/skills/lung-crop/scripts/run_lung_crop.py
         #   cd /.../.claude/skills/foo/scripts && python run_predict.py
-        script_match = re.search(
-            r"(?:^|[;&|]\s*|\s)"
-            r"(?:\S*/)?(?:python[0-9.]*|bash|sh|perl|ruby|node)"
-            r"\s+(?:(?:-[^\s]+\s+)*)"
-            r"(?P<script>[^\s;&|]+?\.(?:py|sh))(?=\s|$)",
-            command,
-        )
+        script_match = _SCRIPT_INVOKE_RE.search(command)
         if not script_match:
             return None
 
         script_path = script_match.group("script").strip("\"'")
-        explicit_skill = re.search(r"[/~][^\s]*?/\.claude/skills/([^/\s]+)", script_path)
+        explicit_skill = _SKILL_PATH_RE.search(script_path)
         if explicit_skill:
             return explicit_skill.group(1)
 
@@ -1327,22 +1337,14 @@ class ClaudeAgent:
 
             if event_type == "content_block_delta":
                 delta = event.get("delta", {})
-                delta_type = delta.get("type", "")
-
-                if delta_type == "text_delta":
-                    text = delta.get("text", "")
-                    if text:
+                spec = DELTA_DISPATCH.get(delta.get("type", ""))
+                if spec:
+                    kind, key = spec
+                    content = delta.get(key, "")
+                    if content:
                         return [NormalizedMessage(
-                            kind=MessageKind.STREAM_DELTA,
-                            content=text,
-                            session_id=session_id,
-                        )]
-                elif delta_type == "thinking_delta":
-                    thinking = delta.get("thinking", "")
-                    if thinking:
-                        return [NormalizedMessage(
-                            kind=MessageKind.THINKING,
-                            content=thinking,
+                            kind=kind,
+                            content=content,
                             session_id=session_id,
                         )]
 
@@ -1436,7 +1438,7 @@ class ClaudeAgent:
         use_stream_json: bool = True,
         user_id: Optional[int] = None,
         conversation_id: Optional[str] = None,
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[dict, None]:
         """
         流式对话 - 输出与参考项目一致的格式
         使用队列机制同时监听消息流和权限请求
@@ -1449,7 +1451,7 @@ class ClaudeAgent:
             user_id: 用户ID
 
         Yields:
-            JSON 字符串
+            事件 dict（由调用方按需序列化，避免中途 dumps/loads 往返）
         """
         full_content = ""
 
@@ -1565,18 +1567,18 @@ class ClaudeAgent:
                 elif item_type == "permission":
                     # 发送权限请求
                     logger.info(f"[PERMISSION_REQUEST] Sending to frontend: {item_data['toolName']}")
-                    yield json.dumps(item_data, ensure_ascii=False)
+                    yield item_data
 
                 elif item_type == "user_question":
                     logger.info(f"[USER_QUESTION_REQUEST] Sending to frontend: {item_data['requestId']}")
-                    yield json.dumps(item_data, ensure_ascii=False)
+                    yield item_data
 
                 elif item_type == "skill_submitted":
                     # 发送 skill 后台任务提交事件
                     logger.info(f"[SKILL_SUBMITTED] Sending to frontend: {item_data.get('skillName')}, task={item_data.get('taskId')}")
                     # 去掉内部标记字段再推给前端
                     event = {k: v for k, v in item_data.items() if k != "_is_skill_submitted"}
-                    yield json.dumps(event, ensure_ascii=False)
+                    yield event
 
                 elif item_type == "message":
                     msg = item_data
@@ -1586,14 +1588,14 @@ class ClaudeAgent:
                             full_content += msg.content
                             data = msg.to_dict()
                             data["done"] = False
-                            yield json.dumps(data, ensure_ascii=False)
+                            yield data
 
                     elif msg.kind == MessageKind.TEXT:
                         if msg.content:
                             full_content += msg.content
                             data = msg.to_dict()
                             data["done"] = False
-                            yield json.dumps(data, ensure_ascii=False)
+                            yield data
 
                     elif msg.kind == MessageKind.THINKING:
                         if msg.content:
@@ -1604,21 +1606,21 @@ class ClaudeAgent:
                                 "provider": "claude",
                                 "done": False
                             }
-                            yield json.dumps(data, ensure_ascii=False)
+                            yield data
 
                     elif msg.kind == MessageKind.TOOL_USE:
                         session_for_tool = msg.session_id or session_id
                         logger.info(f"[TOOL_USE] {msg.tool_name}, session={session_for_tool}")
                         data = msg.to_dict()
                         data["done"] = False
-                        yield json.dumps(data, ensure_ascii=False)
+                        yield data
 
                     elif msg.kind == MessageKind.PERMISSION_REQUEST:
                         # SDK 直接发送的权限请求
                         logger.info(f"[PERMISSION_REQUEST] {msg.tool_name}, session={msg.session_id}")
                         data = msg.to_dict()
                         data["done"] = False
-                        yield json.dumps(data, ensure_ascii=False)
+                        yield data
 
                     elif msg.kind == MessageKind.STREAM_END:
                         pass
@@ -1631,7 +1633,7 @@ class ClaudeAgent:
                             self._session_conversation_map[real_sid] = conversation_id
                         data = msg.to_dict()
                         data["done"] = False
-                        yield json.dumps(data, ensure_ascii=False)
+                        yield data
 
                     elif msg.kind == MessageKind.COMPLETE:
                         session_for_complete = msg.session_id or session_id
@@ -1644,7 +1646,7 @@ class ClaudeAgent:
                             "content": full_content,
                             "aborted": msg.aborted or False,
                         }
-                        yield json.dumps(data, ensure_ascii=False)
+                        yield data
 
                     elif msg.kind == MessageKind.ERROR:
                         data = {
@@ -1656,7 +1658,7 @@ class ClaudeAgent:
                             "done": True,
                             "aborted": msg.aborted or False,
                         }
-                        yield json.dumps(data, ensure_ascii=False)
+                        yield data
 
         finally:
             # 清理任务
@@ -1708,15 +1710,11 @@ class ClaudeAgent:
             AI的完整回复
         """
         full_content = ""
-        async for chunk in self.stream_chat(current_message, session_id, is_file, use_stream_json, user_id=user_id):
-            try:
-                event_data = json.loads(chunk.strip())
-                if event_data.get("content"):
-                    full_content = event_data["content"]
-                elif event_data.get("kind") == MessageKind.COMPLETE:
-                    full_content = event_data.get("content", "")
-            except json.JSONDecodeError:
-                pass
+        async for event_data in self.stream_chat(current_message, session_id, is_file, use_stream_json, user_id=user_id):
+            if event_data.get("content"):
+                full_content = event_data["content"]
+            elif event_data.get("kind") == MessageKind.COMPLETE:
+                full_content = event_data.get("content", "")
         return full_content
 
     async def interrupt(self, session_id: str) -> bool:
@@ -2,7 +2,6 @@
 工具策略模块 - 在工具执行前强制校验工具名和参数
 """
 import logging
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 try:
@@ -46,7 +45,7 @@ class ToolPolicy:
         """
         # 路径参数校验
         if isinstance(input_data, dict):
-            path_fields = TOOLS_WITH_PATH_PARAMS.get(tool_name, [])
+            path_fields = TOOLS_WITH_PATH_PARAMS.get(tool_name, ())
             for field in path_fields:
                 value = input_data.get(field)
                 if value is None:
@@ -63,5 +62,5 @@ class ToolPolicy:
                         logger.warning(f"[ToolPolicy] {reason}")
                         return False, reason
 
-        logger.debug(f"[ToolPolicy] 允许工具调用: {tool_name}")
+        logger.debug("[ToolPolicy] 允许工具调用: %s", tool_name)
         return True, None
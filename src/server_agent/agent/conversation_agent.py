@@ -3,13 +3,20 @@ LangChain-based conversation agent for MediAgent.
 """
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import logging
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 
+from src.server_agent.agent import llm_circuit
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -25,11 +32,16 @@ SYSTEM_PROMPT = """\
 - 不混用语言。\
 """
 
+# 系统消息不随请求变化，构建一次后复用
+SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+# 历史消息角色 -> LangChain 消息类型，其他角色（system/tool 等）直接丢弃
+_ROLE_MESSAGE = {"user": HumanMessage, "assistant": AIMessage}
+
 # ---------------------------------------------------------------------------
 # Config
 # ---------------------------------------------------------------------------
 
-@dataclass
+@dataclass(slots=True)
 class AgentConfig:
     model: str
     api_key: Optional[str] = None
@@ -37,6 +49,29 @@ class AgentConfig:
     temperature: float = 0.2
     request_timeout: float = 60.0
     max_retries: int = 2
+    history_window: int = 20  # 发送给 LLM 的最近历史条数，<=0 表示不截断
+    http_async_client: Optional[Any] = None  # 共享的 httpx.AsyncClient，None 时由 SDK 自建
+    response_cache_ttl: Optional[float] = None  # 完全相同的消息列表复用回复的秒数，None 表示关闭
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+# 请求级 Agent 之间共享：key -> (过期时间, 回复)
+RESPONSE_CACHE_SIZE = 512
+_response_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+# 正在进行中的相同请求：后到者等待先到者的结果，不再重复调用 LLM
+_inflight: "Dict[str, asyncio.Future[str]]" = {}
+
+
+def _response_cache_key(model: str, temperature: float, messages: List[BaseMessage]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{model}\0{temperature}".encode("utf-8"))
+    for msg in messages:
+        content = msg.content if isinstance(msg.content, str) else json.dumps(msg.content, sort_keys=True)
+        digest.update(f"\0{msg.type}\0{content}".encode("utf-8"))
+    return digest.hexdigest()
 
 
 # ---------------------------------------------------------------------------
@@ -63,6 +98,7 @@ class ConversationAgent:
             temperature=self.config.temperature,
             timeout=self.config.request_timeout,
             max_retries=self.config.max_retries,
+            http_async_client=self.config.http_async_client,
         )
 
     def update_config(
@@ -85,14 +121,18 @@ class ConversationAgent:
         rag_context: str = "",
         images: Optional[List[str]] = None,
     ) -> List[BaseMessage]:
-        messages: List[BaseMessage] = [SystemMessage(content=SYSTEM_PROMPT)]
-        for msg in history:
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-            if role == "user":
-                messages.append(HumanMessage(content=content))
-            elif role == "assistant":
-                messages.append(AIMessage(content=content))
+        if not history and not rag_context and not images:
+            # 首轮对话（最常见）：没有历史需要逐条转换，直接拼出消息列表
+            return [SYSTEM_MESSAGE, HumanMessage(content=user_input)]
+        messages: List[BaseMessage] = [SYSTEM_MESSAGE]
+        window = self.config.history_window
+        if window > 0:
+            history = history[-window:]
+        messages.extend(
+            _ROLE_MESSAGE[msg["role"]](content=msg.get("content", ""))
+            for msg in history
+            if msg.get("role") in _ROLE_MESSAGE
+        )
         if rag_context:
             messages.append(SystemMessage(content=rag_context))
         if images:
@@ -112,14 +152,57 @@ class ConversationAgent:
         images: Optional[List[str]] = None,
     ) -> str:
         """Single-turn: wait for full reply and return it."""
+        messages = self._build_messages(user_input, history, rag_context, images)
+        ttl = self.config.response_cache_ttl
+        cache_key = None
+        future: Optional[asyncio.Future] = None
+        reply: Optional[str] = None
+        if ttl:
+            cache_key = _response_cache_key(self.config.model, self.config.temperature, messages)
+            cached = _response_cache.get(cache_key)
+            if cached is not None and cached[0] > time.monotonic():
+                _response_cache.move_to_end(cache_key)
+                return cached[1]
+            pending = _inflight.get(cache_key)
+            if pending is not None:
+                try:
+                    return await asyncio.shield(pending)
+                except asyncio.CancelledError:
+                    if not pending.cancelled():
+                        raise
+                    # 先到者被取消，自己重新发起请求
+            future = asyncio.get_running_loop().create_future()
+            _inflight[cache_key] = future
+        endpoint = self.config.base_url or ""
         try:
-            response: AIMessage = await self._llm.ainvoke(
-                self._build_messages(user_input, history, rag_context, images)
-            )
-            return (response.content or "").strip() or "（空回复）"
+            llm_circuit.check(endpoint)
+            try:
+                response = await self._llm.ainvoke(messages)
+            except Exception as exc:
+                if llm_circuit.is_endpoint_failure(exc):
+                    llm_circuit.record_failure(endpoint)
+                raise
+            llm_circuit.record_success(endpoint)
+            reply = (response.content or "").strip() or "（空回复）"
+            if cache_key is not None:
+                _response_cache[cache_key] = (time.monotonic() + ttl, reply)
+                _response_cache.move_to_end(cache_key)
+                if len(_response_cache) > RESPONSE_CACHE_SIZE:
+                    _response_cache.popitem(last=False)
         except Exception as exc:
             logger.error("LLM call failed: %s", exc, exc_info=True)
-            return f"抱歉，与语言模型通信失败：{exc}"
+            reply = f"抱歉，与语言模型通信失败：{exc}"
+        finally:
+            if future is not None:
+                if _inflight.get(cache_key) is future:
+                    del _inflight[cache_key]
+                if not future.done():
+                    # reply 为 None 说明本请求被取消，通知等待者自行重试
+                    if reply is None:
+                        future.cancel()
+                    else:
+                        future.set_result(reply)
+        return reply
 
     async def stream(
         self,
@@ -129,13 +212,21 @@ class ConversationAgent:
         images: Optional[List[str]] = None,
     ) -> AsyncGenerator[str, None]:
         """Streaming: yield text tokens progressively via astream."""
+        endpoint = self.config.base_url or ""
         try:
-            async for chunk in self._llm.astream(
-                self._build_messages(user_input, history, rag_context, images)
-            ):
-                token: str = chunk.content or ""
-                if token:
-                    yield token
+            llm_circuit.check(endpoint)
+            try:
+                async for chunk in self._llm.astream(
+                    self._build_messages(user_input, history, rag_context, images)
+                ):
+                    token: str = chunk.content or ""
+                    if token:
+                        yield token
+            except Exception as exc:
+                if llm_circuit.is_endpoint_failure(exc):
+                    llm_circuit.record_failure(endpoint)
+                raise
+            llm_circuit.record_success(endpoint)
         except Exception as exc:
             logger.error("LLM stream failed: %s", exc, exc_info=True)
             yield f"\n\n抱歉，与语言模型通信失败：{exc}"
@@ -0,0 +1,67 @@
+"""
+LLM 端点熔断。
+
+同一 base_url 连续失败达到阈值后进入冷却期：冷却期内的请求立即失败，
+不再逐个等待 超时 × (max_retries + 1)。冷却结束后只放行一个请求试探，
+成功即清零；试探仍失败则再次熔断。
+
+只有模型服务本身的故障（连接失败、超时、5xx）计入失败次数，
+工具报错、数据库错误、客户端断开等与端点健康无关的异常不影响熔断状态。
+
+状态按进程共享（Agent 是请求级对象，不能把状态挂在实例上）。
+
+环境变量：
+  LLM_CIRCUIT_THRESHOLD  连续失败多少次后熔断，默认 5，<=0 关闭
+  LLM_CIRCUIT_COOLDOWN   熔断冷却秒数，默认 30
+"""
+from __future__ import annotations
+
+import os
+import time
+from typing import Dict, Tuple
+
+import httpx
+import openai
+
+FAIL_THRESHOLD = int(os.getenv("LLM_CIRCUIT_THRESHOLD", "5"))
+COOLDOWN_SECONDS = float(os.getenv("LLM_CIRCUIT_COOLDOWN", "30"))
+
+# base_url -> (连续失败次数, 冷却截止的 monotonic 时间)
+_states: Dict[str, Tuple[int, float]] = {}
+
+
+class CircuitOpenError(RuntimeError):
+    """端点处于熔断冷却期"""
+
+
+def check(endpoint: str) -> None:
+    """端点熔断中时抛出 CircuitOpenError"""
+    state = _states.get(endpoint)
+    if state is None:
+        return
+    now = time.monotonic()
+    remaining = state[1] - now
+    if remaining > 0:
+        raise CircuitOpenError(f"语言模型服务暂时不可用，约 {remaining:.0f} 秒后再试")
+    if state[0] >= FAIL_THRESHOLD > 0:
+        # 冷却结束：本次请求作为试探放行，其余请求继续等待试探结果
+        _states[endpoint] = (state[0], now + COOLDOWN_SECONDS)
+
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+    """异常是否说明模型端点不可用（APITimeoutError 是 APIConnectionError 的子类）"""
+    if isinstance(exc, (openai.APIConnectionError, httpx.TransportError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
+
+
+def record_success(endpoint: str) -> None:
+    _states.pop(endpoint, None)
+
+
+def record_failure(endpoint: str) -> None:
+    if FAIL_THRESHOLD <= 0:
+        return
+    fails = _states.get(endpoint, (0, 0.0))[0] + 1
+    open_until = time.monotonic() + COOLDOWN_SECONDS if fails >= FAIL_THRESHOLD else 0.0
+    _states[endpoint] = (fails, open_until)
@@ -8,13 +8,14 @@ tools/services outside this agent.
 """
 from __future__ import annotations
 
-import json
 import logging
 import re
 from typing import Any, Dict, List
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from src.server_agent.common.JsonUtils import dumps as _dumps, loads as _loads
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,6 +45,11 @@ JSON schema:
 }
 """.strip()
 
+SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+
+# 解析失败时退回到截取最外层花括号（也覆盖 ```json 代码块包裹的回复）
+_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
 
 class MedicalImageReportAgent:
     """Domain agent for medical imaging report JSON generation."""
@@ -54,14 +60,14 @@ class MedicalImageReportAgent:
     @staticmethod
     def _extract_json(text: str) -> Dict[str, Any]:
         try:
-            parsed = json.loads(text)
+            parsed = _loads(text)
             return parsed if isinstance(parsed, dict) else {}
         except Exception:
-            match = re.search(r"\{.*\}", text, re.S)
+            match = _OBJECT_RE.search(text)
             if not match:
                 return {}
             try:
-                parsed = json.loads(match.group(0))
+                parsed = _loads(match.group(0))
                 return parsed if isinstance(parsed, dict) else {}
             except Exception:
                 return {}
@@ -85,7 +91,7 @@ class MedicalImageReportAgent:
                 "type": "text",
                 "text": (
                     "请生成固定格式医学影像报告 JSON。"
-                    f"\n任务参数：{json.dumps(prompt, ensure_ascii=False)}"
+                    f"\n任务参数：{_dumps(prompt)}"
                 ),
             },
             *visual_content_parts,
@@ -94,7 +100,7 @@ class MedicalImageReportAgent:
         try:
             response = await self.llm.ainvoke(
                 [
-                    SystemMessage(content=SYSTEM_PROMPT),
+                    SYSTEM_MESSAGE,
                     HumanMessage(content=content_parts),
                 ],
                 config={
@@ -5,10 +5,12 @@ LLM 自主决策是否需要调用工具查询知识库，而非每次都强制
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import mimetypes
 import os
+import random
 from dataclasses import dataclass
 from typing import Any, AsyncGenerator, Dict, List, Optional
 
@@ -17,10 +19,22 @@ from langchain_core.tools import StructuredTool
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
 from pydantic import BaseModel, Field
+from src.server_agent.agent import llm_circuit
 from src.server_agent.agent.medical_report_agent import MedicalImageReportAgent
+from src.server_agent.common.JsonUtils import dumps as _dumps, loads as _loads
 from src.server_agent.mapper.paths import in_data
 from src.server_agent.service.EmbeddingService import EmbeddingService
 
+
+def _parse_tool_output(raw: str) -> Optional[dict]:
+    """把工具返回的 JSON 字符串解析为 dict，解析失败或不是对象时返回 None。"""
+    try:
+        parsed = _loads(raw)
+    except Exception:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
 _embedding_service = EmbeddingService()
 
 logger = logging.getLogger(__name__)
@@ -58,6 +72,19 @@ class MedicalReportInput(BaseModel):
     language: str = Field("zh-CN", description="报告语言，zh-CN 或 en-US")
 
 
+# 请求级工具的参数模型在模块级定义一次；不传 args_schema 时 StructuredTool 每次都会按函数签名新建 pydantic 模型
+class QueryInput(BaseModel):
+    query: str
+
+
+class DatasetPathInput(BaseModel):
+    path: str
+
+
+class OptionalDatasetPathInput(BaseModel):
+    path: Optional[str] = None
+
+
 class DateTimeInput(BaseModel):
     target: Optional[str] = Field(
         None,
@@ -76,12 +103,44 @@ class DateTimeInput(BaseModel):
     )
 
 
-async def _web_search(query: str) -> str:
-    """网络搜索工具：使用 Tavily API（免费 1000 次/月，注册：https://tavily.com）。"""
+WEB_SEARCH_MAX_ATTEMPTS = 3
+RETRIABLE_STATUS_CODES = frozenset({408, 409, 429})
+
+
+def _is_retriable_error(exc: Exception) -> bool:
+    """超时、连接错误及 408/409/429/5xx 视为可重试，其余 4xx 等直接失败。"""
+    import httpx
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return status in RETRIABLE_STATUS_CODES or status >= 500
+    return isinstance(exc, (httpx.TransportError, TimeoutError))
+
+
+def _backoff_delay(attempt: int) -> float:
+    """指数退避 + 抖动，避免限流时集中重试。"""
+    return min(8.0, 0.25 * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+async def _tavily_search(query: str) -> dict:
+    """调用 Tavily 搜索，遇到可重试错误时按退避重试。"""
     from tavily import AsyncTavilyClient
     client = AsyncTavilyClient(api_key=os.environ["TAVILY_API_KEY"])
+    for attempt in range(WEB_SEARCH_MAX_ATTEMPTS):
+        try:
+            return await client.search(query, max_results=6, search_depth="basic")
+        except Exception as exc:
+            if attempt + 1 >= WEB_SEARCH_MAX_ATTEMPTS or not _is_retriable_error(exc):
+                raise
+            delay = _backoff_delay(attempt)
+            logger.info("Tavily search retry %d in %.2fs: %s", attempt + 1, delay, exc)
+            await asyncio.sleep(delay)
+
+
+async def _web_search(query: str) -> str:
+    """网络搜索工具：使用 Tavily API（免费 1000 次/月，注册：https://tavily.com）。"""
     try:
-        resp = await client.search(query, max_results=6, search_depth="basic")
+        resp = await _tavily_search(query)
         lines: list[str] = []
         for r in resp.get("results", []):
             title = r.get("title", "")
@@ -94,8 +153,41 @@ async def _web_search(query: str) -> str:
         return f"Tavily 搜索失败: {exc}"
 
 
+# read_dataset_text_file 允许读取的非 text/* 文本后缀
+DATASET_TEXT_SUFFIXES = frozenset({".txt", ".md", ".csv", ".json", ".tsv", ".log", ".xml", ".html"})
+
+# generate_medical_report 完成后展示的子步骤（固定内容）
+REPORT_CHILD_CALLS = (
+    {
+        "name": "MedicalImageReportAgent",
+        "display_name": "Medical Image Report Agent",
+        "icon": "🧠",
+        "status": "done",
+        "input_summary": "分析医学影像预览与元数据",
+        "output_summary": "生成结构化报告 JSON",
+    },
+    {
+        "name": "render_medical_report",
+        "display_name": "Report Renderer",
+        "icon": "📄",
+        "status": "done",
+        "input_summary": "report JSON + 影像预览",
+        "output_summary": "生成 HTML 报告与 JSON 文件",
+    },
+)
+
+# 文件读取类工具回填给 LLM 的最大字符数；超出部分省略，避免单个文件撑大后续每一轮的上下文
+TOOL_TEXT_MAX_CHARS = 20000
+
+
+def _clip_tool_text(text: str) -> str:
+    if len(text) <= TOOL_TEXT_MAX_CHARS:
+        return text
+    return f"{text[:TOOL_TEXT_MAX_CHARS]}\n\n……（内容过长，已截断，仅保留前 {TOOL_TEXT_MAX_CHARS} 字符，共 {len(text)} 字符）"
+
+
 async def _read_local_file(path: str) -> str:
-    """读取本地文件内容。传入完整文件路径，返回文件文本（限 100 KB 以内）。"""
+    """读取本地文件内容。传入完整文件路径，返回文件文本（文件限 100 KB 以内，返回内容最多前 20000 字符，超出部分截断）。"""
     import pathlib
     safe_dir = pathlib.Path(os.getenv("SAFE_READ_DIR", os.path.expanduser("~/mediagent"))).resolve()
     try:
@@ -105,8 +197,8 @@ async def _read_local_file(path: str) -> str:
             return f"文件不存在或不是普通文件: {path}"
         size = target.stat().st_size
         if size > 100 * 1024:
-            return f"文件过大（{size // 1024} KB），仅支持 100 KB 以内的文件"
-        return target.read_text(encoding="utf-8", errors="replace")
+            return f"文件过大（{size // 1024} KB），仅支持 100 KB 以内的文件，且最多返回前 {TOOL_TEXT_MAX_CHARS} 字符"
+        return _clip_tool_text(target.read_text(encoding="utf-8", errors="replace"))
     except ValueError:
         return f"安全限制：只能读取 {safe_dir} 目录下的文件"
     except Exception as exc:
@@ -180,6 +272,24 @@ def _get_datetime(
     return json.dumps(result, ensure_ascii=False)
 
 
+# 不依赖请求上下文的工具只构建一次（from_function 每次都要推断参数 schema）
+READ_FILE_TOOL = StructuredTool.from_function(
+    coroutine=_read_local_file,
+    name="read_local_file",
+    description=f"读取本地文件内容。传入完整文件路径，返回文件的文本内容（限 100 KB 以内的文件，最多返回前 {TOOL_TEXT_MAX_CHARS} 字符，超出部分截断）。",
+)
+DATETIME_TOOL = StructuredTool.from_function(
+    func=_get_datetime,
+    name="get_datetime",
+    description=(
+        "获取当前或指定日期时间信息。支持 now/today/tomorrow/yesterday、ISO 日期或日期时间、"
+        "IANA 时区和天数偏移；可用于回答现在几点、某天星期几、跨时区时间、明天/昨天/本周等时间问题。"
+        "禁止凭训练数据推测时间。"
+    ),
+    args_schema=DateTimeInput,
+)
+
+
 SYSTEM_PROMPT = """\
 你是一个医疗工具助手，负责与用户直接对话，提供专业的医学信息与智能分析支持。
 
@@ -202,8 +312,12 @@ SYSTEM_PROMPT = """\
 - 不得编造患者身份、检查日期、病理结果、真实诊断或测量值。
 - 如果工具结果提示图像分析不足，应明确建议医生复核或补充结构化测量数据。"""
 
+SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+# 只把 user/assistant 历史转换成消息
+_ROLE_MESSAGE = {"user": HumanMessage, "assistant": AIMessage}
+
 
-@dataclass
+@dataclass(slots=True)
 class AgentConfig:
     model: str
     api_key: Optional[str] = None
@@ -211,6 +325,8 @@ class AgentConfig:
     temperature: float = 0.2
     request_timeout: float = 60.0
     max_retries: int = 2
+    history_window: int = 20  # 发送给 LLM 的最近历史条数，<=0 表示不截断
+    http_async_client: Optional[Any] = None  # 共享的 httpx.AsyncClient，None 时由 SDK 自建
 
 
 class ReActAgent:
@@ -223,6 +339,9 @@ class ReActAgent:
 
     def __init__(self, config: AgentConfig) -> None:
         self.config = config
+        # 最近一次 stream() 收集到的引用与工具调用，供调用方直接持久化（无需再解析事件 JSON）
+        self.last_sources: List[dict] = []
+        self.last_tool_calls: List[dict] = []
         self._build_llm()
 
     def _build_llm(self) -> None:
@@ -233,6 +352,7 @@ class ReActAgent:
             temperature=self.config.temperature,
             timeout=self.config.request_timeout,
             max_retries=self.config.max_retries,
+            http_async_client=self.config.http_async_client,
         )
 
     def update_config(
@@ -254,14 +374,18 @@ class ReActAgent:
         history: List[Dict[str, str]],
         images: Optional[List[str]] = None,
     ) -> List[BaseMessage]:
-        messages: List[BaseMessage] = [SystemMessage(content=SYSTEM_PROMPT)]
-        for msg in history:
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-            if role == "user":
-                messages.append(HumanMessage(content=content))
-            elif role == "assistant":
-                messages.append(AIMessage(content=content))
+        if not history and not images:
+            # 首轮对话（最常见）：没有历史需要逐条转换，直接拼出消息列表
+            return [SYSTEM_MESSAGE, HumanMessage(content=user_input)]
+        messages: List[BaseMessage] = [SYSTEM_MESSAGE]
+        window = self.config.history_window
+        if window > 0:
+            history = history[-window:]
+        messages.extend(
+            _ROLE_MESSAGE[msg["role"]](content=msg.get("content", ""))
+            for msg in history
+            if msg.get("role") in _ROLE_MESSAGE
+        )
         if images:
             content_parts: List[dict] = [{"type": "text", "text": user_input}]
             for img_url in images:
@@ -288,16 +412,30 @@ class ReActAgent:
             [SEARCH_START]{...}   — KB 搜索开始
             [SEARCH_RESULT]{...}  — KB 搜索结束
             [SOURCES]{...}        — 知识库引用列表（搜索后汇总一次）
-            [TOOL_CALLS]{...}     — 完整工具调用链路（用于持久化）
             <text tokens>         — LLM 逐 token 输出
+
+        完整工具调用链路不再作为事件输出，调用方从 last_tool_calls / last_sources 读取。
         """
         collected_sources: List[dict] = []
         collected_tool_calls: List[dict] = []
+        self.last_sources = collected_sources
+        self.last_tool_calls = collected_tool_calls
         _sources_before: List[int] = [0]  # 可变容器，供闭包跨事件共享
         _ws_results: List[dict] = []     # 最近一次 web_search 的结构化结果
         current_user_id = str(user_id) if user_id is not None else ""
         current_user_role = user_role or "user"
 
+        async def _fetch_kbs():
+            try:
+                return await kb_mapper.get_all_kbs()
+            except Exception as exc:
+                logger.warning("获取知识库列表失败: %s", exc)
+                return None
+
+        # 知识库列表在本轮首次调用 search_knowledge_base 时才查询，同一轮内的（并行）调用共用这一次查询；
+        # 多数轮次不检索知识库，不为它们额外查库
+        kbs_task: List[Optional[asyncio.Task]] = [None]
+
         def _validate_dataset_path(path: str, *, must_be_file: bool = False, must_be_dir: bool = False):
             from pathlib import Path
 
@@ -332,7 +470,11 @@ class ReActAgent:
             if kb_mapper is None:
                 return "（知识库未配置）"
 
-            kbs = await kb_mapper.get_all_kbs()
+            if kbs_task[0] is None:
+                kbs_task[0] = asyncio.create_task(_fetch_kbs())
+            kbs = await asyncio.shield(kbs_task[0])
+            if kbs is None:
+                kbs = await kb_mapper.get_all_kbs()
             if not kbs:
                 return "（当前没有可用的知识库）"
 
@@ -390,14 +532,13 @@ class ReActAgent:
             coroutine=_search_kb,
             name="search_knowledge_base",
             description="搜索医疗知识库，获取相关医学文献、指南、诊疗规范。当需要专业医学信息时调用。",
+            args_schema=QueryInput,
         )
         async def _web_search_cached(query: str) -> str:
             """搜索互联网获取最新资讯、新闻、实时数据、百科知识。当用户需要网络上的最新信息时调用。"""
-            from tavily import AsyncTavilyClient
             logger.info("[web_search] starting query: %s", query[:80])
-            client = AsyncTavilyClient(api_key=os.environ["TAVILY_API_KEY"])
             try:
-                resp = await client.search(query, max_results=6, search_depth="basic")
+                resp = await _tavily_search(query)
                 logger.info("[web_search] raw resp type=%s keys=%s", type(resp).__name__, list(resp.keys()) if isinstance(resp, dict) else "N/A")
                 _ws_results.clear()
                 lines: list[str] = []
@@ -417,23 +558,8 @@ class ReActAgent:
             coroutine=_web_search_cached,
             name="web_search",
             description="搜索互联网获取最新资讯、新闻、实时数据、百科知识。当用户需要网络上的最新信息时调用。",
+            args_schema=QueryInput,
         )
-        read_file_tool = StructuredTool.from_function(
-            coroutine=_read_local_file,
-            name="read_local_file",
-            description="读取本地文件内容。传入完整文件路径，返回文件的文本内容。",
-        )
-        datetime_tool = StructuredTool.from_function(
-            func=_get_datetime,
-            name="get_datetime",
-            description=(
-                "获取当前或指定日期时间信息。支持 now/today/tomorrow/yesterday、ISO 日期或日期时间、"
-                "IANA 时区和天数偏移；可用于回答现在几点、某天星期几、跨时区时间、明天/昨天/本周等时间问题。"
-                "禁止凭训练数据推测时间。"
-            ),
-            args_schema=DateTimeInput,
-        )
-
         async def _list_dataset_files(path: Optional[str] = None) -> str:
             """列出用户 dataset 目录下的文件。path 为空时列出 private/{当前用户}/dataset。"""
             import mimetypes
@@ -455,7 +581,7 @@ class ReActAgent:
                     "mime_type": mime_type,
                     "size": child.stat().st_size if child.is_file() else 0,
                 })
-            return json.dumps({"path": rel_path, "items": items}, ensure_ascii=False, indent=2)
+            return _dumps({"path": rel_path, "items": items})
 
         async def _read_dataset_text_file(path: str) -> str:
             """读取 dataset 下的文本文件内容，限制 200KB。"""
@@ -463,14 +589,13 @@ class ReActAgent:
             if error:
                 return error
             mime_type = mimetypes.guess_type(str(abs_path))[0] or "application/octet-stream"
-            text_ext = {".txt", ".md", ".csv", ".json", ".tsv", ".log", ".xml", ".html"}
-            if not (mime_type.startswith("text/") or abs_path.suffix.lower() in text_ext):
+            if not (mime_type.startswith("text/") or abs_path.suffix.lower() in DATASET_TEXT_SUFFIXES):
                 return f"该文件不是文本文件，不能直接读取：{path}（{mime_type}）"
             size = abs_path.stat().st_size
             if size > 200 * 1024:
                 return f"文件过大（{size // 1024}KB），仅支持读取 200KB 以内的文本文件。"
             try:
-                return abs_path.read_text(encoding="utf-8", errors="replace")
+                return _clip_tool_text(abs_path.read_text(encoding="utf-8", errors="replace"))
             except Exception as exc:
                 return f"读取失败：{exc}"
 
@@ -505,22 +630,25 @@ class ReActAgent:
                     }
                 except Exception as exc:
                     result["nifti_error"] = str(exc)
-            return json.dumps(result, ensure_ascii=False, indent=2)
+            return _dumps(result)
 
         list_dataset_tool = StructuredTool.from_function(
             coroutine=_list_dataset_files,
             name="list_dataset_files",
             description="列出当前用户 dataset 目录中的文件和子目录。path 为空时列出 private/{当前用户ID}/dataset。",
+            args_schema=OptionalDatasetPathInput,
         )
         read_dataset_text_tool = StructuredTool.from_function(
             coroutine=_read_dataset_text_file,
             name="read_dataset_text_file",
             description="读取 private/{用户ID}/dataset 下的文本文件内容。仅支持 txt、md、csv、json 等小文本文件。",
+            args_schema=DatasetPathInput,
         )
         dataset_metadata_tool = StructuredTool.from_function(
             coroutine=_get_dataset_file_metadata,
             name="get_dataset_file_metadata",
             description="获取 private/{用户ID}/dataset 下文件或目录的元数据，包括类型、大小和 MIME。",
+            args_schema=DatasetPathInput,
         )
 
         async def _generate_medical_report(
@@ -919,7 +1047,7 @@ class ReActAgent:
                 "preview_url": f"/files/serve/{rel_output}/report.html",
                 "disclaimer": report.get("disclaimer"),
             }
-            return json.dumps(result, ensure_ascii=False, indent=2)
+            return _dumps(result)
 
         medical_report_tool = StructuredTool.from_function(
             coroutine=_generate_medical_report,
@@ -937,8 +1065,8 @@ class ReActAgent:
             tools=[
                 search_tool,
                 web_search_tool,
-                read_file_tool,
-                datetime_tool,
+                READ_FILE_TOOL,
+                DATETIME_TOOL,
                 list_dataset_tool,
                 read_dataset_text_tool,
                 dataset_metadata_tool,
@@ -948,9 +1076,13 @@ class ReActAgent:
 
         messages = self._build_messages(user_input, history, images)
         if selected_files_context:
-            messages.insert(1, SystemMessage(content=selected_files_context))
+            # 每次请求变化的上下文放在历史之后、当前问题之前，保持 [系统提示 + 历史] 前缀逐字节稳定，
+            # 便于模型服务的前缀缓存命中
+            messages.insert(len(messages) - 1, SystemMessage(content=selected_files_context))
 
+        endpoint = self.config.base_url or ""
         try:
+            llm_circuit.check(endpoint)
             async for event in agent_graph.astream_events(
                 {"messages": messages},
                 version="v2",
@@ -977,11 +1109,11 @@ class ReActAgent:
                         "query": input_summary,
                         "status": "running",
                     })
-                    yield f"[TOOL_START]{json.dumps({'name': name, 'display_name': meta['display_name'], 'icon': meta['icon'], 'input_summary': input_summary}, ensure_ascii=False)}"
+                    yield f"[TOOL_START]{_dumps({'name': name, 'display_name': meta['display_name'], 'icon': meta['icon'], 'input_summary': input_summary})}"
 
                     if name == "search_knowledge_base":
                         _sources_before[0] = len(collected_sources)
-                        yield f"[SEARCH_START]{json.dumps({'kb': '知识库', 'kb_id': 0, 'query': input_summary}, ensure_ascii=False)}"
+                        yield f"[SEARCH_START]{_dumps({'kb': '知识库', 'kb_id': 0, 'query': input_summary})}"
 
                 elif kind == "on_tool_end":
                     meta = TOOL_META.get(name, {"display_name": name, "icon": "🔧"})
@@ -992,76 +1124,43 @@ class ReActAgent:
                     logger.info("[on_tool_end] name=%s raw_output type=%s raw_str[:80]=%s _ws_results=%d",
                                 name, type(raw_output).__name__, raw_str[:80], len(_ws_results))
 
-                    for tc in reversed(collected_tool_calls):
-                        if tc.get("name") == name and tc.get("status") == "running":
-                            tc["status"] = "done"
-                            tc["output_summary"] = output_summary
-                            break
+                    # 只定位一次本次结束的工具调用记录，后续直接更新
+                    current_call = next(
+                        (tc for tc in reversed(collected_tool_calls)
+                         if tc.get("name") == name and tc.get("status") == "running"),
+                        None,
+                    ) or next((tc for tc in reversed(collected_tool_calls) if tc.get("name") == name), {})
+                    current_call["status"] = "done"
 
                     if name == "search_knowledge_base":
                         found = len(collected_sources) - _sources_before[0]
-                        for tc in reversed(collected_tool_calls):
-                            if tc.get("name") == name:
-                                tc["found"] = found
-                                break
-                        yield f"[SEARCH_RESULT]{json.dumps({'kb': '知识库', 'kb_id': 0, 'found': found}, ensure_ascii=False)}"
+                        current_call["found"] = found
+                        yield f"[SEARCH_RESULT]{_dumps({'kb': '知识库', 'kb_id': 0, 'found': found})}"
                         output_summary = f"找到 {found} 个相关片段"
 
                     elif name == "get_datetime":
-                        try:
-                            datetime_result = json.loads(raw_str)
-                            if isinstance(datetime_result, dict):
-                                output_summary = datetime_result.get("summary") or datetime_result.get("message") or output_summary
-                        except Exception:
-                            pass
+                        datetime_result = _parse_tool_output(raw_str)
+                        if datetime_result is not None:
+                            output_summary = datetime_result.get("summary") or datetime_result.get("message") or output_summary
 
                     elif name == "web_search" and _ws_results:
                         output_summary = f"找到 {len(_ws_results)} 条结果"
                         extra["search_results"] = list(_ws_results)
-                        for tc in reversed(collected_tool_calls):
-                            if tc.get("name") == name:
-                                tc["search_results"] = list(_ws_results)
-                                break
+                        current_call["search_results"] = list(_ws_results)
 
                     elif name == "generate_medical_report":
-                        try:
-                            report_result = json.loads(raw_str)
-                        except Exception:
-                            report_result = None
-                        if isinstance(report_result, dict) and report_result.get("status") == "success":
+                        report_result = _parse_tool_output(raw_str)
+                        if report_result is not None and report_result.get("status") == "success":
                             output_summary = f"已生成报告：{report_result.get('title') or '医学报告'}"
                             extra["report_result"] = report_result
-                            child_calls = [
-                                {
-                                    "name": "MedicalImageReportAgent",
-                                    "display_name": "Medical Image Report Agent",
-                                    "icon": "🧠",
-                                    "status": "done",
-                                    "input_summary": "分析医学影像预览与元数据",
-                                    "output_summary": "生成结构化报告 JSON",
-                                },
-                                {
-                                    "name": "render_medical_report",
-                                    "display_name": "Report Renderer",
-                                    "icon": "📄",
-                                    "status": "done",
-                                    "input_summary": "report JSON + 影像预览",
-                                    "output_summary": "生成 HTML 报告与 JSON 文件",
-                                },
-                            ]
+                            child_calls = [dict(call) for call in REPORT_CHILD_CALLS]
                             extra["child_calls"] = child_calls
-                            for tc in reversed(collected_tool_calls):
-                                if tc.get("name") == name:
-                                    tc["report_result"] = report_result
-                                    tc["child_calls"] = child_calls
-                                    break
+                            current_call["report_result"] = report_result
+                            current_call["child_calls"] = child_calls
 
-                    for tc in reversed(collected_tool_calls):
-                        if tc.get("name") == name:
-                            tc["output_summary"] = output_summary
-                            break
+                    current_call["output_summary"] = output_summary
 
-                    yield f"[TOOL_END]{json.dumps({'name': name, 'display_name': meta['display_name'], 'icon': meta['icon'], 'success': True, 'output_summary': output_summary, **extra}, ensure_ascii=False)}"
+                    yield f"[TOOL_END]{_dumps({'name': name, 'display_name': meta['display_name'], 'icon': meta['icon'], 'success': True, 'output_summary': output_summary, **extra})}"
 
                 elif kind == "on_chat_model_stream":
                     chunk = event.get("data", {}).get("chunk")
@@ -1070,11 +1169,15 @@ class ReActAgent:
                         if isinstance(token, str) and token:
                             yield token
 
+            llm_circuit.record_success(endpoint)
             if collected_sources:
-                yield f"[SOURCES]{json.dumps(collected_sources, ensure_ascii=False)}"
-            if collected_tool_calls:
-                yield f"[TOOL_CALLS]{json.dumps(collected_tool_calls, ensure_ascii=False)}"
+                yield f"[SOURCES]{_dumps(collected_sources)}"
 
         except Exception as exc:
+            if llm_circuit.is_endpoint_failure(exc):
+                llm_circuit.record_failure(endpoint)
             logger.error("ReActAgent stream failed: %s", exc, exc_info=True)
             yield f"\n\n抱歉，与语言模型通信失败：{exc}"
+        finally:
+            if kbs_task[0] is not None and not kbs_task[0].done():
+                kbs_task[0].cancel()
@@ -0,0 +1,15 @@
+"""
+JSON 序列化工具
+热路径（消息 JSONB 列、SSE 事件、工具结果）统一使用 orjson
+"""
+from typing import Any
+
+import orjson
+
+
+def dumps(obj: Any) -> str:
+    """序列化为紧凑 JSON 字符串（非 ASCII 字符原样保留）"""
+    return orjson.dumps(obj).decode("utf-8")
+
+
+loads = orjson.loads
@@ -2,10 +2,19 @@ import json
 import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 
-@dataclass(frozen=True)
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size)，文件不存在时为 None"""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+@dataclass(frozen=True, slots=True)
 class ModelSnapshot:
     """模型快照，用来驱动运行态"原子重建" """
     current_model_id: str
@@ -32,11 +41,24 @@ class ConfigProvider:
         # 内存缓存
         self._data: Dict[str, Any] = {}
         self._main_data: Dict[str, Any] = {}
+        # 上次加载时两个文件的签名；每次请求只 stat，文件有变化才重新解析
+        self._signatures: Tuple[Optional[Tuple[int, int]], ...] = ()
         self.reload_from_disk()
 
+    def _current_signatures(self) -> Tuple[Optional[Tuple[int, int]], ...]:
+        return _file_signature(self._path), _file_signature(self._main_config_path)
+
+    def _refresh(self) -> None:
+        """配置文件在磁盘上变化（含外部修改）时重新加载"""
+        with self._lock:
+            if self._current_signatures() != self._signatures:
+                self.reload_from_disk()
+
     def reload_from_disk(self) -> None:
         """从磁盘加载配置"""
         with self._lock:
+            # 先记录签名再读取：读取期间若有写入，下次 _refresh 会再加载一次
+            self._signatures = self._current_signatures()
             # 加载用户配置
             if self._path.exists():
                 self._data = json.loads(self._path.read_text("utf-8"))
@@ -59,7 +81,7 @@ class ConfigProvider:
         """设置当前模型"""
         with self._lock:
             # 重新从磁盘加载最新配置
-            self.reload_from_disk()
+            self._refresh()
 
             # 检查模型是否在主配置中存在
             main_models = self._main_data.get("models", {})
@@ -77,7 +99,7 @@ class ConfigProvider:
     def get_model_snapshot(self, model_id: str) -> Optional[ModelSnapshot]:
         """按配置 ID 获取一个不可变、可用于单次请求的模型快照。"""
         with self._lock:
-            self.reload_from_disk()
+            self._refresh()
             current_model = self._main_data.get("models", {}).get(model_id)
             if not current_model or not current_model.get("enabled", True):
                 return None
@@ -94,7 +116,7 @@ class ConfigProvider:
     def get_default_model_id(self) -> str:
         """返回有效的系统默认模型；默认项失效时回退到第一个启用模型。"""
         with self._lock:
-            self.reload_from_disk()
+            self._refresh()
             models = self._main_data.get("models", {})
             current_model_id = self._data.get("current_model_id", "")
             current_model = models.get(current_model_id)
@@ -113,5 +135,5 @@ class ConfigProvider:
     def get_current_model_id(self) -> str:
         """获取当前模型ID"""
         with self._lock:
-            self.reload_from_disk()
+            self._refresh()
             return self._data.get("current_model_id", "")
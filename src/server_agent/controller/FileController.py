@@ -6,6 +6,7 @@ from typing import Iterator, List
 import io
 import pathlib
 import queue
+import stat
 import threading
 from urllib.parse import quote
 import zipfile
@@ -110,7 +111,7 @@ class FileController(BaseController):
                     return ResultUtils.error(403, "Invalid path")
                 
                 # 检查文件是否存在
-                if not file_path.exists() or not file_path.is_file():
+                if not file_path.is_file():
                     return ResultUtils.error(404, "File not found")
                 
                 # 判断是否可在浏览器内联预览
@@ -331,20 +332,26 @@ class FileController(BaseController):
             try:
                 with zipfile.ZipFile(writer, "w", compression=zipfile.ZIP_STORED) as archive:
                     for target in targets:
-                        if target.is_symlink():
+                        # 每个路径只 lstat 一次，符号链接/目录/普通文件都从 st_mode 判断
+                        mode = target.lstat().st_mode
+                        if stat.S_ISLNK(mode):
                             continue
-                        if target.is_file():
+                        if stat.S_ISREG(mode):
                             archive.write(target, arcname=target.name)
                             continue
 
                         wrote_entry = False
                         for child in target.rglob("*"):
-                            if child.is_symlink():
+                            try:
+                                mode = child.lstat().st_mode
+                            except FileNotFoundError:  # 遍历期间被删除
+                                continue
+                            if stat.S_ISLNK(mode):
                                 continue
                             archive_name = pathlib.Path(target.name) / child.relative_to(target)
-                            if child.is_dir():
+                            if stat.S_ISDIR(mode):
                                 archive.writestr(f"{archive_name.as_posix()}/", "")
-                            elif child.is_file():
+                            elif stat.S_ISREG(mode):
                                 archive.write(child, arcname=archive_name.as_posix())
                             wrote_entry = True
                         if not wrote_entry:
@@ -124,6 +124,11 @@ class ModelController(BaseController):
                 str(current_user.uid), model_id
             )
 
+        # 只读接口共享的解析结果：(mtime_ns, size, config)
+        main_config_cache: Dict[str, tuple] = {}
+        # /configs 的已启用模型列表：(构建时所用的 config 对象, models_dict)
+        enabled_models_cache: Dict[str, tuple] = {}
+
         @self.router.get("/configs", response_model=BaseResponse[ModelConfigsResponse])
         async def getModelConfigs(
             req: Request,
@@ -132,22 +137,27 @@ class ModelController(BaseController):
             """获取所有已启用的模型配置"""
             try:
                 main_config, _ = load_main_config()
-                models_dict = {}
-
-                for model_id, main_model in main_config.get("models", {}).items():
-                    if not main_model.get("enabled", True):
-                        continue
-
-                    models_dict[model_id] = ModelConfigResponse(
-                        id=main_model["id"],
-                        name=main_model["name"],
-                        description=main_model["description"],
-                        provider=main_model["provider"],
-                        base_url="",
-                        api_key=None,
-                        status="online",
-                        tags=main_model.get("capabilities", [])
-                    )
+                # 模型列表只取决于配置文件本身，配置未变化时复用上次构建的结果，每次请求只解析当前模型
+                cached = enabled_models_cache.get("main")
+                if cached and cached[0] is main_config:
+                    models_dict = cached[1]
+                else:
+                    models_dict = {}
+                    for model_id, main_model in main_config.get("models", {}).items():
+                        if not main_model.get("enabled", True):
+                            continue
+
+                        models_dict[model_id] = ModelConfigResponse(
+                            id=main_model["id"],
+                            name=main_model["name"],
+                            description=main_model["description"],
+                            provider=main_model["provider"],
+                            base_url="",
+                            api_key=None,
+                            status="online",
+                            tags=main_model.get("capabilities", [])
+                        )
+                    enabled_models_cache["main"] = (main_config, models_dict)
 
                 current_model_id = await resolve_user_model_id(req, current_user)
                 
@@ -355,8 +365,14 @@ class ModelController(BaseController):
 
         # ==================== 管理员API辅助函数 ====================
         
-        def load_main_config():
-            """加载主模型配置文件"""
+
+        def load_main_config(for_update: bool = False):
+            """
+            加载主模型配置文件
+
+            只读接口拿到的是按文件签名缓存的共享对象，不得修改；
+            需要修改后保存的调用方传 for_update=True，拿到一份新解析的副本。
+            """
             import json
             from pathlib import Path
             
@@ -364,11 +380,20 @@ class ModelController(BaseController):
             current_dir = Path(__file__).parent.parent
             main_config_path = current_dir / "configs" / "main_model_config.json"
             
-            if not main_config_path.exists():
+            try:
+                stat = main_config_path.stat()
+            except FileNotFoundError:
                 raise HTTPException(status_code=404, detail="Main model config file not found")
-            
+
+            cached = main_config_cache.get("main")
+            if not for_update and cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                return cached[2], main_config_path
+
             with open(main_config_path, 'r', encoding='utf-8') as f:
-                return json.load(f), main_config_path
+                config = json.load(f)
+            if not for_update:
+                main_config_cache["main"] = (stat.st_mtime_ns, stat.st_size, config)
+            return config, main_config_path
         
         def save_main_config(config, config_path):
             """保存主模型配置文件"""
@@ -422,7 +447,7 @@ class ModelController(BaseController):
                     if field not in model_data:
                         raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
                 
-                config, config_path = load_main_config()
+                config, config_path = load_main_config(for_update=True)
                 
                 # 检查模型是否已存在
                 if model_data["id"] in config.get("models", {}):
@@ -477,7 +502,7 @@ class ModelController(BaseController):
                 # if not check_admin_permission():
                 #     raise HTTPException(status_code=403, detail="Admin permission required")
                 
-                config, config_path = load_main_config()
+                config, config_path = load_main_config(for_update=True)
                 
                 if model_id not in config.get("models", {}):
                     raise HTTPException(status_code=404, detail="Model not found")
@@ -510,7 +535,7 @@ class ModelController(BaseController):
                 # if not check_admin_permission():
                 #     raise HTTPException(status_code=403, detail="Admin permission required")
                 
-                config, config_path = load_main_config()
+                config, config_path = load_main_config(for_update=True)
                 
                 if model_id not in config.get("models", {}):
                     raise HTTPException(status_code=404, detail="Model not found")
@@ -536,7 +561,7 @@ class ModelController(BaseController):
                 # if not check_admin_permission():
                 #     raise HTTPException(status_code=403, detail="Admin permission required")
                 
-                config, config_path = load_main_config()
+                config, config_path = load_main_config(for_update=True)
                 
                 if model_id not in config.get("models", {}):
                     raise HTTPException(status_code=404, detail="Model not found")
@@ -2,7 +2,9 @@
 Skill 控制器
 提供从真实 ~/.claude/skills 目录读取 skill 的 API 接口
 """
+import asyncio
 from typing import List, Optional
+
 from fastapi import Depends, Header, Query, Request, UploadFile, File
 
 from src.server_agent.common import ResultUtils, BaseResponse
@@ -88,8 +90,8 @@ class SkillController(BaseController):
                     if agent:
                         installed_skills_dir = Path(agent["base_dir"]) / ".claude" / "skills"
                 rows = await mapper.list_skills(search=search)
-                skills = []
-                for r in rows:
+
+                def build_skill_item(r: dict) -> dict:
                     global_enriched = enrich_skill_record(r, registry)
                     global_version = read_skill_config_version(r["storage_path"]) or r["version"]
                     installed_enriched = None
@@ -108,7 +110,7 @@ class SkillController(BaseController):
                         and installed_version
                         and global_version != installed_version
                     )
-                    skills.append({
+                    return {
                         "id":          r["slug"],
                         "name":        r["name"],
                         "type":        r["type"],
@@ -131,7 +133,10 @@ class SkillController(BaseController):
                         "installed_pipeline_ready": installed_enriched.get("pipeline_ready") if installed_enriched else None,
                         "installed_version": installed_version,
                         "update_available": update_available,
-                    })
+                    }
+
+                # 校验会对每个 skill 运行 wrapper --help 子进程并读文件，放到线程池并发执行，避免阻塞事件循环
+                skills = await asyncio.gather(*(asyncio.to_thread(build_skill_item, r) for r in rows))
                 return ResultUtils.success(skills)
             except Exception as e:
                 return ResultUtils.error(ErrorCode.SYSTEM_ERROR, f"获取 skill 列表失败: {str(e)}")
@@ -155,7 +160,7 @@ class SkillController(BaseController):
                 skill["user_id"] = record["user_id"]
                 skill["created_at"] = str(record["created_at"]) if record.get("created_at") else ""
                 from src.server_agent.service.SkillRegistryService import SkillRegistryService
-                enriched = enrich_skill_record(record, SkillRegistryService(mapper))
+                enriched = await asyncio.to_thread(enrich_skill_record, record, SkillRegistryService(mapper))
                 skill["validation"] = enriched.get("validation")
                 skill["skill_level"] = enriched.get("skill_level")
                 skill["valid_patient_skill"] = enriched.get("valid_patient_skill")
@@ -243,7 +248,7 @@ class SkillController(BaseController):
                 from src.server_agent.service.SkillRegistryService import SkillRegistryService
                 registry = SkillRegistryService(request.app.state.agent_mapper)
                 zip_bytes = await file.read()
-                validation = registry.validate_skill_zip(zip_bytes)
+                validation = await asyncio.to_thread(registry.validate_skill_zip, zip_bytes)
                 return ResultUtils.success(validation)
             except ValueError as e:
                 return ResultUtils.error(ErrorCode.INVALID_INPUT, str(e))
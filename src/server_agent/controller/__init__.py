@@ -121,6 +121,7 @@ async def lifespan(app: FastAPI):
         for service in getattr(app.state, "shutdown_services", []):
             await service.close()
         await close_service_cache()
+        await registry.close()
         await code_agent_mapper.close()
         await conv_mapper.close()
         await agent_mapper.close()
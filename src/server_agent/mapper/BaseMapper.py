@@ -14,6 +14,17 @@ from src.server_agent.exceptions import DatabaseError, handle_mapper_exception
 
 logger = logging.getLogger(__name__)
 
+# 每个新连接都要设置的参数
+_CONNECTION_PRAGMAS = """
+PRAGMA foreign_keys = ON;
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA busy_timeout = 30000;
+PRAGMA cache_size = 10000;
+PRAGMA temp_store = MEMORY;
+PRAGMA mmap_size = 268435456; -- 256MB 内存映射读，热点查询免 read() 拷贝
+"""
+
 
 class BaseMapper(ABC):
     """基础 Mapper 类"""
@@ -25,6 +36,8 @@ class BaseMapper(ABC):
         self._pool_size = 0
         self._max_pool_size = 10
         self._pool_lock = asyncio.Lock()
+        # SQLite 同一时刻只有一个写者：进程内先排队，而不是让多个连接在 busy_timeout 里轮询抢锁
+        self._write_lock = asyncio.Lock()
 
     def _ensure_db_directory(self):
         """确保数据库目录存在"""
@@ -40,13 +53,8 @@ class BaseMapper(ABC):
                 isolation_level=None  # 自动提交模式
             )
 
-            # 设置 SQLite 优化参数
-            await db.execute("PRAGMA foreign_keys = ON;")
-            await db.execute("PRAGMA journal_mode = WAL;")
-            await db.execute("PRAGMA synchronous = NORMAL;")
-            await db.execute("PRAGMA busy_timeout = 30000;")
-            await db.execute("PRAGMA cache_size = 10000;")
-            await db.execute("PRAGMA temp_store = MEMORY;")
+            # 设置 SQLite 优化参数（一次 executescript 提交，免去逐条切换到 aiosqlite 线程）
+            await db.executescript(_CONNECTION_PRAGMAS)
 
             return db
         except Exception as e:
@@ -143,7 +151,7 @@ class BaseMapper(ABC):
         Returns:
             事务是否成功
         """
-        async with self.get_connection() as db:
+        async with self._write_lock, self.get_connection() as db:
             try:
                 await db.execute("BEGIN IMMEDIATE;")
 
@@ -174,7 +182,7 @@ class BaseMapper(ABC):
         Returns:
             影响的行数
         """
-        async with self.get_connection() as db:
+        async with self._write_lock, self.get_connection() as db:
             try:
                 await db.execute("BEGIN IMMEDIATE;")
 
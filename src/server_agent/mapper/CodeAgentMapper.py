@@ -5,7 +5,6 @@
 import asyncio
 import logging
 import uuid
-from datetime import datetime
 from typing import List, Optional
 
 import asyncpg
@@ -15,18 +14,36 @@ from src.server_agent.model.entity.CodeAgentConversation import (
     ConversationDetail,
     ConversationInfo,
     CodeAgentConversation,
-    CodeAgentMessage
 )
 
 logger = logging.getLogger(__name__)
 
 
+_SKILL_TASK_UPSERT_SQL = """
+    INSERT INTO skill_tasks
+        (task_id, skill_name, params, conversation_id, status,
+         progress, created_at, started_at, finished_at,
+         error, output, cancelled, updated_at)
+    VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,CURRENT_TIMESTAMP)
+    ON CONFLICT (task_id) DO UPDATE SET
+        status      = EXCLUDED.status,
+        progress    = EXCLUDED.progress,
+        params      = EXCLUDED.params,
+        started_at  = EXCLUDED.started_at,
+        finished_at = EXCLUDED.finished_at,
+        error       = EXCLUDED.error,
+        output      = EXCLUDED.output,
+        cancelled   = EXCLUDED.cancelled,
+        updated_at  = CURRENT_TIMESTAMP
+"""
+
 class CodeAgentMapper:
     """CodeAgent数据访问层"""
 
     def __init__(self):
         self._config = get_pg_config()
         self._pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
         self._initialized = False
 
     async def init(self) -> None:
@@ -67,15 +84,19 @@ class CodeAgentMapper:
     async def _get_pool(self) -> asyncpg.Pool:
         """获取连接池"""
         if self._pool is None:
-            self._pool = await asyncpg.create_pool(
-                host=self._config.host,
-                port=self._config.port,
-                database=self._config.database,
-                user=self._config.user,
-                password=self._config.password,
-                min_size=1,
-                max_size=10
-            )
+            # SkillTaskManager 持有的实例不走 init()，首次落库时多个 persist 任务
+            # 会并发到这里；加锁保证只建一个连接池
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        host=self._config.host,
+                        port=self._config.port,
+                        database=self._config.database,
+                        user=self._config.user,
+                        password=self._config.password,
+                        min_size=1,
+                        max_size=10
+                    )
         return self._pool
 
     async def _ensure_tables(self) -> None:
@@ -435,41 +456,36 @@ class CodeAgentMapper:
     #  skill_tasks 持久化 CRUD
     # ------------------------------------------------------------------ #
 
-    async def upsert_skill_task(self, task: dict) -> None:
-        """插入或更新一条 skill_task 记录（以 task_id 为主键）"""
+    @staticmethod
+    def _skill_task_args(task: dict) -> tuple:
+        """skill_task dict -> _SKILL_TASK_UPSERT_SQL 的参数元组"""
         import json as _json
+        return (
+            task["task_id"],
+            task["skill_name"],
+            _json.dumps(task.get("params", {}), ensure_ascii=False),
+            task["conversation_id"],
+            task["status"],
+            task.get("progress", 0),
+            task["created_at"],
+            task.get("started_at"),
+            task.get("finished_at"),
+            task.get("error"),
+            _json.dumps(task.get("output"), ensure_ascii=False) if task.get("output") is not None else None,
+            task.get("cancelled", False),
+        )
+
+    async def upsert_skill_tasks(self, tasks: List[dict]) -> None:
+        """批量插入或更新 skill_task 记录，单个事务内完成"""
+        if not tasks:
+            return
         pool = await self._get_pool()
         async with pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO skill_tasks
-                    (task_id, skill_name, params, conversation_id, status,
-                     progress, created_at, started_at, finished_at,
-                     error, output, cancelled, updated_at)
-                VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,CURRENT_TIMESTAMP)
-                ON CONFLICT (task_id) DO UPDATE SET
-                    status      = EXCLUDED.status,
-                    progress    = EXCLUDED.progress,
-                    params      = EXCLUDED.params,
-                    started_at  = EXCLUDED.started_at,
-                    finished_at = EXCLUDED.finished_at,
-                    error       = EXCLUDED.error,
-                    output      = EXCLUDED.output,
-                    cancelled   = EXCLUDED.cancelled,
-                    updated_at  = CURRENT_TIMESTAMP
-            """,
-                task["task_id"],
-                task["skill_name"],
-                _json.dumps(task.get("params", {}), ensure_ascii=False),
-                task["conversation_id"],
-                task["status"],
-                task.get("progress", 0),
-                task["created_at"],
-                task.get("started_at"),
-                task.get("finished_at"),
-                task.get("error"),
-                _json.dumps(task.get("output"), ensure_ascii=False) if task.get("output") is not None else None,
-                task.get("cancelled", False),
-            )
+            async with conn.transaction():
+                await conn.executemany(
+                    _SKILL_TASK_UPSERT_SQL,
+                    [self._skill_task_args(task) for task in tasks],
+                )
 
     async def delete_skill_task(self, task_id: str) -> bool:
         """删除单条 skill_task 记录"""
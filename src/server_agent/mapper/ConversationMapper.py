@@ -9,11 +9,21 @@ from typing import Any, Dict, List, Optional
 
 import asyncpg
 
+from ..common.JsonUtils import dumps as _dumps, loads as _loads
 from ..configs.pg_config import get_pg_config
 
 logger = logging.getLogger(__name__)
 
 
+def _parse_json_col(raw: Any) -> list:
+    """JSONB 列可能以 str 或已解码对象返回，统一转为 list"""
+    if isinstance(raw, str):
+        return _loads(raw)
+    if raw is None:
+        return []
+    return list(raw)
+
+
 class ConversationMapper:
     """对话及消息的数据库操作类（PostgreSQL）"""
 
@@ -111,17 +121,15 @@ class ConversationMapper:
         owner_uid = str(owner_uid)
         pool = await self._get_pool()
         async with pool.acquire() as conn:
+            # 直接插入，由 uid 唯一约束兜底碰撞，省去每次先查一遍是否存在的往返
             while True:
-                uid = self._generate_uid()
-                exists = await conn.fetchval(
-                    "SELECT 1 FROM conversations WHERE uid=$1", uid
+                uid = await conn.fetchval(
+                    "INSERT INTO conversations (uid, owner_uid, title) VALUES ($1, $2, $3) "
+                    "ON CONFLICT (uid) DO NOTHING RETURNING uid",
+                    self._generate_uid(), owner_uid, title,
                 )
-                if not exists:
+                if uid is not None:
                     break
-            await conn.execute(
-                "INSERT INTO conversations (uid, owner_uid, title) VALUES ($1, $2, $3)",
-                uid, owner_uid, title,
-            )
         logger.info("Conversation created: %s", uid)
         return uid
 
@@ -149,14 +157,11 @@ class ConversationMapper:
             deleted = int(result.split()[-1])
             return deleted > 0
 
-    async def user_owns_conversation(self, uid: str, owner_uid: str) -> bool:
+    async def get_conversation_owner(self, uid: str) -> Optional[str]:
+        """返回对话 owner_uid，不存在时返回 None"""
         pool = await self._get_pool()
         async with pool.acquire() as conn:
-            row = await conn.fetchval(
-                "SELECT 1 FROM conversations WHERE uid=$1 AND owner_uid=$2",
-                uid, str(owner_uid),
-            )
-            return row is not None
+            return await conn.fetchval("SELECT owner_uid FROM conversations WHERE uid=$1", uid)
 
     # ==================== User model preference ====================
 
@@ -191,10 +196,9 @@ class ConversationMapper:
         tool_calls: list | None = None,
     ) -> None:
         """追加一条消息，并更新 conversation.updated_at"""
-        import json
-        attachments_json = json.dumps(attachments or [])
-        sources_json = json.dumps(sources or [])
-        tool_calls_json = json.dumps(tool_calls or [])
+        attachments_json = _dumps(attachments or [])
+        sources_json = _dumps(sources or [])
+        tool_calls_json = _dumps(tool_calls or [])
         pool = await self._get_pool()
         async with pool.acquire() as conn:
             async with conn.transaction():
@@ -207,9 +211,41 @@ class ConversationMapper:
                     conversation_uid,
                 )
 
+    async def add_messages(self, conversation_uid: str, messages: List[Dict]) -> None:
+        """在同一事务中批量追加消息（如一问一答），只更新一次 conversation.updated_at"""
+        rows = [
+            (
+                conversation_uid, m["role"], m["content"],
+                _dumps(m.get("attachments") or []),
+                _dumps(m.get("sources") or []),
+                _dumps(m.get("tool_calls") or []),
+            )
+            for m in messages
+        ]
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(
+                    "INSERT INTO messages (conversation_uid, role, content, attachments, sources, tool_calls) VALUES ($1, $2, $3, $4::jsonb, $5::jsonb, $6::jsonb)",
+                    rows,
+                )
+                await conn.execute(
+                    "UPDATE conversations SET updated_at=NOW() WHERE uid=$1",
+                    conversation_uid,
+                )
+
+    async def get_history(self, conversation_uid: str) -> List[Dict]:
+        """仅取 role/content，用于构建 LLM 上下文（不解析 JSONB 列）"""
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT role, content FROM messages WHERE conversation_uid=$1 ORDER BY id ASC",
+                conversation_uid,
+            )
+            return [{"role": r["role"], "content": r["content"]} for r in rows]
+
     async def get_messages(self, conversation_uid: str) -> List[Dict]:
         """获取对话全量消息，按 id 升序"""
-        import json
         pool = await self._get_pool()
         async with pool.acquire() as conn:
             rows = await conn.fetch(
@@ -218,12 +254,6 @@ class ConversationMapper:
             )
             result = []
             for r in rows:
-                def _parse_json_col(raw):
-                    if isinstance(raw, str):
-                        return json.loads(raw)
-                    if raw is None:
-                        return []
-                    return list(raw)
                 result.append({
                     "role": r["role"],
                     "content": r["content"],
@@ -123,18 +123,19 @@ class KnowledgeBaseMapper:
 
     async def update_kb(self, kb_id: int, update_data: dict) -> bool:
         """更新知识库信息"""
-        allowed = {k: v for k, v in update_data.items()
-                   if k not in ("id", "created_by", "created_at") and v is not None}
-        if not allowed:
-            return False
-        pool = await self._get_pool()
+        # 过滤与拼 SET 子句合并为一次遍历
         idx = 1
         sets = []
         vals = []
-        for key, val in allowed.items():
+        for key, val in update_data.items():
+            if val is None or key in ("id", "created_by", "created_at"):
+                continue
             sets.append(f"{key} = ${idx}")
             vals.append(val)
             idx += 1
+        if not sets:
+            return False
+        pool = await self._get_pool()
         sets.append(f"updated_at = CURRENT_TIMESTAMP")
         vals.append(kb_id)
         query = f"UPDATE knowledge_bases SET {', '.join(sets)} WHERE id = ${idx}"
@@ -207,13 +208,13 @@ class KnowledgeBaseMapper:
                 status, doc_id,
             )
 
-    async def update_document_chunk_count(self, doc_id: int, chunk_count: int) -> None:
-        """更新文档 chunk 数量"""
+    async def update_document_result(self, doc_id: int, chunk_count: int, status: str) -> None:
+        """一条 UPDATE 同时写入 chunk 数量与处理状态"""
         pool = await self._get_pool()
         async with pool.acquire() as conn:
             await conn.execute(
-                "UPDATE kb_documents SET chunk_count = $1, updated_at = CURRENT_TIMESTAMP WHERE id = $2",
-                chunk_count, doc_id,
+                "UPDATE kb_documents SET chunk_count = $1, status = $2, updated_at = CURRENT_TIMESTAMP WHERE id = $3",
+                chunk_count, status, doc_id,
             )
 
     async def close(self) -> None:
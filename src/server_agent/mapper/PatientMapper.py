@@ -8,6 +8,18 @@ from src.server_agent.model.entity.PatientInfo import PatientInfo
 
 logger = logging.getLogger(__name__)
 
+# update_patient 允许修改的列，顺序即 SET 子句顺序
+_UPDATABLE_FIELDS = (
+    "name",
+    "sex",
+    "age",
+    "phone",
+    "height_cm",
+    "smoking_status",
+    "pathology_type",
+    "pd_l1_status",
+)
+
 
 class PatientMapper:
     """PostgreSQL data access for the global patient registry."""
@@ -185,25 +197,15 @@ class PatientMapper:
         return [self._to_patient(record) for record in records]
 
     async def update_patient(self, patient_id: str, data: Dict[str, Any]) -> Optional[PatientInfo]:
-        allowed_fields = [
-            "name",
-            "sex",
-            "age",
-            "phone",
-            "height_cm",
-            "smoking_status",
-            "pathology_type",
-            "pd_l1_status",
-        ]
-        update_fields = [field for field in allowed_fields if field in data]
-        if not update_fields:
-            return await self.get_patient(patient_id)
-
         assignments = []
         values: list[Any] = []
-        for index, field in enumerate(update_fields, start=1):
-            assignments.append(f"{field} = ${index}")
-            values.append(data[field])
+        for field in _UPDATABLE_FIELDS:
+            if field in data:
+                values.append(data[field])
+                assignments.append(f"{field} = ${len(values)}")
+        if not assignments:
+            return await self.get_patient(patient_id)
+
         patient_id_index = len(values) + 1
         values.append(patient_id)
 
@@ -2,6 +2,9 @@ import logging
 import os
 from typing import Optional
 
+from openai import DefaultAsyncHttpxClient
+import httpx
+
 from src.server_agent.agent.conversation_agent import AgentConfig, ConversationAgent
 from src.server_agent.agent.react_agent import ReActAgent
 from src.server_agent.configs.config_provider import ConfigProvider, ModelSnapshot
@@ -9,12 +12,37 @@ from src.server_agent.exceptions import ValidationError
 
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# 空闲连接保活秒数。httpx 默认 5s，用户两轮对话之间的间隔通常更长，过短会导致每轮都重新建连
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE", "60"))
+
+# 到模型服务的并发上限。HTTP/1.1 下即同时在途的请求数；排队的请求等待连接池空位，
+# 让 vLLM 等服务端拿到平稳的批量，而不是一次性被突发请求打满
+HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "200"))
+
+# 非流式对话对完全相同的上下文复用回复的秒数（0 关闭）
+RESPONSE_CACHE_TTL = float(os.getenv("LLM_RESPONSE_CACHE_TTL", "0"))
+
 
 class RuntimeRegistry:
     """根据请求模型创建隔离的 Agent，避免用户之间共享可变 LLM 状态。"""
 
     def __init__(self, provider: ConfigProvider) -> None:
         self._provider = provider
+        # 请求级 Agent 共享同一个连接池，复用到模型服务的 keep-alive / HTTP/2 连接
+        self._http_client = DefaultAsyncHttpxClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_keepalive_connections=min(100, HTTP_MAX_CONNECTIONS),
+                max_connections=HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
 
     def _resolve_snapshot(self, model_id: Optional[str]) -> ModelSnapshot:
         selected_model_id = model_id or self._provider.get_default_model_id()
@@ -35,13 +63,14 @@ class RuntimeRegistry:
             )
         return snapshot
 
-    @staticmethod
-    def _to_agent_config(snapshot: ModelSnapshot) -> AgentConfig:
+    def _to_agent_config(self, snapshot: ModelSnapshot) -> AgentConfig:
         return AgentConfig(
             model=snapshot.model,
             api_key=snapshot.api_key,
             base_url=snapshot.base_url,
             temperature=snapshot.temperature,
+            http_async_client=self._http_client,
+            response_cache_ttl=RESPONSE_CACHE_TTL or None,
         )
 
     def get_agent(self, model_id: Optional[str] = None) -> ConversationAgent:
@@ -53,3 +82,6 @@ class RuntimeRegistry:
         snapshot = self._resolve_snapshot(model_id)
         logger.info("Creating request-scoped ReActAgent — model=%s", snapshot.current_model_id)
         return ReActAgent(self._to_agent_config(snapshot))
+
+    async def close(self) -> None:
+        await self._http_client.aclose()
@@ -3,6 +3,9 @@ from __future__ import annotations
 import asyncio
 import logging
 import mimetypes
+import os
+import re
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
@@ -15,12 +18,43 @@ from src.server_agent.service.OssService import OssService
 
 logger = logging.getLogger(__name__)
 
+# 进程内最多镜像多少个会话的历史（LRU 淘汰），默认 0 关闭、每轮从库读取。
+# 镜像只跟踪本进程的写入，仅在确定单 worker、单副本部署时开启（如设为 256）；
+# 多 worker / 多副本下其他进程写入的轮次不会出现在镜像里
+HISTORY_CACHE_SIZE = int(os.getenv("CONVERSATION_HISTORY_CACHE_SIZE", "0"))
+# 会话 owner 缓存上限（owner 创建后不会变化，无需失效，仅删除会话时移除）
+OWNER_CACHE_SIZE = 1024
+
+# 快速通道：纯寒暄/致谢直接回复，不调用 LLM（CHAT_FAST_PATHS=0 关闭）
+ENABLE_FAST_PATHS = os.getenv("CHAT_FAST_PATHS", "1") != "0"
+_GREETING_RE = re.compile(
+    r"^\s*(?:你好|您好|嗨|哈喽|hi|hello|hey)[\s!！~～。.,，]*$", re.IGNORECASE
+)
+_GREETING_REPLY_ZH = "您好！我是医学影像智能助手，请问有什么可以帮您？"
+_GREETING_REPLY_EN = "Hello! I'm your medical imaging assistant. How can I help you today?"
+_THANKS_RE = re.compile(
+    r"^\s*(?:谢谢|多谢|感谢|谢啦|thanks|thank you|thx)[\s!！~～。.,，]*$", re.IGNORECASE
+)
+_THANKS_REPLY_ZH = "不客气！如果还有其他问题，随时告诉我。"
+_THANKS_REPLY_EN = "You're welcome! Let me know if there's anything else I can help with."
+# (匹配规则, 中文回复, 英文回复)，按顺序匹配
+_FAST_REPLIES = (
+    (_GREETING_RE, _GREETING_REPLY_ZH, _GREETING_REPLY_EN),
+    (_THANKS_RE, _THANKS_REPLY_ZH, _THANKS_REPLY_EN),
+)
+
 
 class ConversationService:
     """会话服务类（PostgreSQL 版本，无本地文件 I/O）"""
 
     def __init__(self) -> None:
-        pass
+        # 会话历史镜像（HISTORY_CACHE_SIZE>0 时启用）：冷启动时从库加载一次，之后随本进程的写入增量追加
+        self._history_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._owner_cache: "OrderedDict[str, str]" = OrderedDict()
+        # 未命中缓存、正在查库的 owner 查询，同一会话的并发请求共用一次查询
+        self._owner_inflight: Dict[str, asyncio.Task] = {}
+        # OSS 客户端（及其 HTTP 连接池）在本服务内复用，不随每次删除重建
+        self._oss_service = OssService()
 
     # ---------------------- 私有：从 app.state 获取依赖 ----------------------
 
@@ -36,6 +70,83 @@ class ConversationService:
     def _get_kb_mapper(self, request):
         return getattr(request.app.state, "kb_mapper", None)
 
+    # ---------------------- 私有：所有权校验 ----------------------
+
+    async def _get_owner(self, mapper: ConversationMapper, conversation_uid: str) -> Optional[str]:
+        """返回会话 owner_uid（会话不存在时为 None）；按会话缓存，命中时不再查库"""
+        owner_uid = self._owner_cache.get(conversation_uid)
+        if owner_uid is None:
+            task = self._owner_inflight.get(conversation_uid)
+            if task is not None:
+                # shield：某个等待方被取消时不影响共享的查询
+                return await asyncio.shield(task)
+            task = asyncio.ensure_future(mapper.get_conversation_owner(conversation_uid))
+            self._owner_inflight[conversation_uid] = task
+            try:
+                owner_uid = await asyncio.shield(task)
+            finally:
+                self._owner_inflight.pop(conversation_uid, None)
+            if owner_uid is None:
+                return None
+            self._owner_cache[conversation_uid] = owner_uid
+            if len(self._owner_cache) > OWNER_CACHE_SIZE:
+                self._owner_cache.popitem(last=False)
+        else:
+            self._owner_cache.move_to_end(conversation_uid)
+        return owner_uid
+
+    async def _user_owns_conversation(
+        self, mapper: ConversationMapper, conversation_uid: str, user_id: str
+    ) -> bool:
+        """所有权校验"""
+        owner_uid = await self._get_owner(mapper, conversation_uid)
+        return owner_uid is not None and owner_uid == str(user_id)
+
+    # ---------------------- 私有：会话历史镜像 ----------------------
+
+    async def _load_history(
+        self, mapper: ConversationMapper, conversation_uid: str, limit: int = 0
+    ) -> List[Dict[str, Any]]:
+        """返回会话历史快照；已镜像的会话不再回库全量查询。limit>0 时只拷贝最近 limit 条"""
+        if HISTORY_CACHE_SIZE <= 0:
+            history = await mapper.get_history(conversation_uid)
+            return history[-limit:] if limit > 0 else history
+        cached = self._history_cache.get(conversation_uid)
+        if cached is None:
+            loaded = await mapper.get_history(conversation_uid)
+            # 并发冷加载时以先装入的为准：它之后追加的轮次可能比这份快照更新
+            cached = self._history_cache.setdefault(conversation_uid, loaded)
+            if len(self._history_cache) > HISTORY_CACHE_SIZE:
+                self._history_cache.popitem(last=False)
+        else:
+            self._history_cache.move_to_end(conversation_uid)
+        return cached[-limit:] if limit > 0 else list(cached)
+
+    def _append_history(self, conversation_uid: str, role: str, content: str) -> None:
+        """消息落库后同步追加到镜像（未镜像的会话下次冷启动再加载）"""
+        cached = self._history_cache.get(conversation_uid)
+        if cached is not None:
+            cached.append({"role": role, "content": content})
+
+    def _discard_history(self, conversation_uid: str) -> None:
+        """写入过程出错时丢弃镜像，无法确认库里落了哪些消息，下次从库重新加载"""
+        self._history_cache.pop(conversation_uid, None)
+
+    @staticmethod
+    def _match_fast_reply(
+        content: str,
+        images: Optional[List[str]] = None,
+        attachments: Optional[List[dict]] = None,
+    ) -> Optional[str]:
+        """命中快速通道时返回固定回复，否则返回 None"""
+        if not ENABLE_FAST_PATHS or images or attachments:
+            return None
+        text = content or ""
+        for pattern, reply_zh, reply_en in _FAST_REPLIES:
+            if pattern.match(text):
+                return reply_en if text.strip()[:1].isascii() else reply_zh
+        return None
+
     def _prepare_dataset_attachments(
         self,
         attachments: Optional[List[dict]],
@@ -108,6 +219,45 @@ class ConversationService:
         lines.append("</selected_dataset_files>")
         return validated, "\n".join(lines)
 
+    async def _build_rag_context(self, kb_mapper, all_results: List[dict]) -> Tuple[str, List[dict]]:
+        """取得分最优的前 5 条检索结果，拼装参考资料上下文与引用列表。"""
+        all_results.sort(key=lambda x: x["score"])
+        top = all_results[:5]
+
+        doc_names: dict[int, str] = {}
+        for r in top:
+            doc_id = r.get("doc_id")
+            if doc_id and doc_id not in doc_names:
+                try:
+                    doc = await kb_mapper.get_document_by_id(doc_id)
+                    doc_names[doc_id] = doc.file_name if doc else f"doc_{doc_id}"
+                except Exception:
+                    doc_names[doc_id] = f"doc_{doc_id}"
+
+        lines = [
+            "<参考资料>",
+            "以下内容来自知识库，请结合参考回答用户问题，并在回答末尾注明参考来源编号：",
+            "",
+        ]
+        for i, r in enumerate(top, 1):
+            lines.append(f"[{i}] 知识库：{r['kb_name']}")
+            lines.append(r["content"])
+            lines.append("")
+        lines.append("</参考资料>")
+
+        sources = [
+            {
+                "kb_name": r["kb_name"],
+                "file_name": doc_names.get(r.get("doc_id"), ""),
+                "content": r["content"][:300],
+                "score": round(r["score"], 4),
+                "doc_id": r.get("doc_id"),
+            }
+            for r in top
+        ]
+        logger.info("RAG: found %d relevant chunks for query", len(top))
+        return "\n".join(lines), sources
+
     async def _fetch_rag_context(self, request, user_msg: str) -> Tuple[str, List[dict]]:
         """并行检索所有知识库，返回 (rag_context_string, sources_list)。"""
         try:
@@ -134,42 +284,7 @@ class ConversationService:
             if not all_results:
                 return "", []
 
-            all_results.sort(key=lambda x: x["score"])
-            top = all_results[:5]
-
-            doc_names: dict[int, str] = {}
-            for r in top:
-                doc_id = r.get("doc_id")
-                if doc_id and doc_id not in doc_names:
-                    try:
-                        doc = await kb_mapper.get_document_by_id(doc_id)
-                        doc_names[doc_id] = doc.file_name if doc else f"doc_{doc_id}"
-                    except Exception:
-                        doc_names[doc_id] = f"doc_{doc_id}"
-
-            lines = [
-                "<参考资料>",
-                "以下内容来自知识库，请结合参考回答用户问题，并在回答末尾注明参考来源编号：",
-                "",
-            ]
-            for i, r in enumerate(top, 1):
-                lines.append(f"[{i}] 知识库：{r['kb_name']}")
-                lines.append(r["content"])
-                lines.append("")
-            lines.append("</参考资料>")
-
-            sources = [
-                {
-                    "kb_name": r["kb_name"],
-                    "file_name": doc_names.get(r.get("doc_id"), ""),
-                    "content": r["content"][:300],
-                    "score": round(r["score"], 4),
-                    "doc_id": r.get("doc_id"),
-                }
-                for r in top
-            ]
-            logger.info("RAG: found %d relevant chunks for query", len(top))
-            return "\n".join(lines), sources
+            return await self._build_rag_context(kb_mapper, all_results)
 
         except Exception as exc:
             logger.warning("RAG 检索失败，降级到普通对话: %s", exc)
@@ -213,44 +328,9 @@ class ConversationService:
         if not all_results:
             return
 
-        all_results.sort(key=lambda x: x["score"])
-        top = all_results[:5]
-
-        # 批量查文件名
-        doc_names: dict[int, str] = {}
-        for r in top:
-            doc_id = r.get("doc_id")
-            if doc_id and doc_id not in doc_names:
-                try:
-                    doc = await kb_mapper.get_document_by_id(doc_id)
-                    doc_names[doc_id] = doc.file_name if doc else f"doc_{doc_id}"
-                except Exception:
-                    doc_names[doc_id] = f"doc_{doc_id}"
-
-        lines = [
-            "<参考资料>",
-            "以下内容来自知识库，请结合参考回答用户问题，并在回答末尾注明参考来源编号：",
-            "",
-        ]
-        for i, r in enumerate(top, 1):
-            lines.append(f"[{i}] 知识库：{r['kb_name']}")
-            lines.append(r["content"])
-            lines.append("")
-        lines.append("</参考资料>")
-
-        sources = [
-            {
-                "kb_name": r["kb_name"],
-                "file_name": doc_names.get(r.get("doc_id"), ""),
-                "content": r["content"][:300],
-                "score": round(r["score"], 4),
-                "doc_id": r.get("doc_id"),
-            }
-            for r in top
-        ]
-        logger.info("RAG: found %d relevant chunks for query", len(top))
+        context, sources = await self._build_rag_context(kb_mapper, all_results)
         yield f"[SOURCES]{json.dumps(sources, ensure_ascii=False)}"
-        rag_context = json.dumps({"context": "\n".join(lines)}, ensure_ascii=False)
+        rag_context = json.dumps({"context": context}, ensure_ascii=False)
         yield f"[RAG_CONTEXT]{rag_context}"
 
     # ---------------------- 对话管理 ----------------------
@@ -273,14 +353,16 @@ class ConversationService:
         """获取对话全量消息；可选校验所有权"""
         mapper = self._get_mapper(request)
 
-        if not await mapper.conversation_exists(conversation_uid):
+        # owner 查询（通常命中缓存）同时确认会话存在，不再单独 conversation_exists
+        owner_uid = await self._get_owner(mapper, conversation_uid)
+        if owner_uid is None:
             raise NotFoundError(
                 resource_type="conversation",
                 resource_id=conversation_uid,
                 detail="该对话不存在",
             )
 
-        if user_id and not await mapper.user_owns_conversation(conversation_uid, user_id):
+        if user_id and owner_uid != str(user_id):
             raise AuthorizationError(
                 detail="无权访问该会话",
                 context={"conversation_uid": conversation_uid, "user_id": user_id},
@@ -307,7 +389,7 @@ class ConversationService:
             )
 
         # 删库前先收集所有图片 URL，提取 object_key
-        oss_service = OssService()
+        oss_service = self._oss_service
         messages = await mapper.get_messages(conversation_uid)
         object_keys = [
             key
@@ -319,12 +401,14 @@ class ConversationService:
         ]
 
         deleted = await mapper.delete_conversation(conversation_uid)
+        self._history_cache.pop(conversation_uid, None)
+        self._owner_cache.pop(conversation_uid, None)
         logger.info("会话删除成功: %s", conversation_uid)
 
         # 异步清理 OSS（不阻塞响应）
         if deleted and object_keys:
             logger.info("异步清理 OSS 对象 %d 个: %s", len(object_keys), conversation_uid)
-            asyncio.get_event_loop().run_in_executor(None, oss_service.delete_objects, object_keys)
+            asyncio.get_running_loop().run_in_executor(None, oss_service.delete_objects, object_keys)
 
         return deleted
 
@@ -340,19 +424,32 @@ class ConversationService:
     ) -> dict:
         """同步发送：等待完整回复后返回 {reply, sources}"""
         mapper = self._get_mapper(request)
-        if user_id and not await mapper.user_owns_conversation(conversation_uid, user_id):
+        if user_id and not await self._user_owns_conversation(mapper, conversation_uid, user_id):
             raise AuthorizationError(
                 detail="无权访问该会话",
                 context={"conversation_uid": conversation_uid, "user_id": user_id},
             )
-        agent = self._get_agent(request, model_id)
-
-        rag_context, sources = await self._fetch_rag_context(request, content)
-        history = await mapper.get_messages(conversation_uid)
-        reply = await agent.converse(content, history, rag_context=rag_context, images=images)
-
-        await mapper.add_message(conversation_uid, "user", content, attachments)
-        await mapper.add_message(conversation_uid, "assistant", reply, sources=sources)
+        fast_reply = self._match_fast_reply(content, images, attachments)
+        try:
+            if fast_reply is not None:
+                rag_context, sources, reply = "", [], fast_reply
+            else:
+                agent = self._get_agent(request, model_id)
+                (rag_context, sources), history = await asyncio.gather(
+                    self._fetch_rag_context(request, content),
+                    self._load_history(mapper, conversation_uid, agent.config.history_window),
+                )
+                reply = await agent.converse(content, history, rag_context=rag_context, images=images)
+
+            await mapper.add_messages(conversation_uid, [
+                {"role": "user", "content": content, "attachments": attachments},
+                {"role": "assistant", "content": reply, "sources": sources},
+            ])
+        except BaseException:
+            self._discard_history(conversation_uid)
+            raise
+        self._append_history(conversation_uid, "user", content)
+        self._append_history(conversation_uid, "assistant", reply)
 
         return {"reply": reply, "sources": sources}
 
@@ -365,54 +462,58 @@ class ConversationService:
         model_id: Optional[str] = None,
     ) -> AsyncGenerator[str, None]:
         """流式发送：ReAct agent 自主决策是否查知识库，逐 token yield，完成后持久化"""
-        import json
         mapper = self._get_mapper(request)
-        if user_id and not await mapper.user_owns_conversation(conversation_uid, user_id):
+        if user_id and not await self._user_owns_conversation(mapper, conversation_uid, user_id):
             raise AuthorizationError(
                 detail="无权访问该会话",
                 context={"conversation_uid": conversation_uid, "user_id": user_id},
             )
-        react_agent = self._get_react_agent(request, model_id)
-        kb_mapper = self._get_kb_mapper(request)
-        validated_attachments, selected_files_context = self._prepare_dataset_attachments(
-            attachments, user_id=user_id, user_role=user_role
-        )
-
-        history = await mapper.get_messages(conversation_uid)
-        await mapper.add_message(conversation_uid, "user", content, validated_attachments)
-
-        sources_data: list = []
-        tool_calls_data: list = []
-        full_reply: List[str] = []
         try:
-            async for event in react_agent.stream(
-                content,
-                history,
-                kb_mapper=kb_mapper,
-                images=images,
-                user_id=user_id,
-                user_role=user_role,
-                selected_files_context=selected_files_context,
-            ):
-                if event.startswith("[SOURCES]"):
-                    try:
-                        sources_data = json.loads(event[9:])
-                    except Exception:
-                        pass
-                    yield event
-                elif event.startswith("[TOOL_CALLS]"):
-                    try:
-                        tool_calls_data = json.loads(event[12:])
-                    except Exception:
-                        pass
-                elif event.startswith(("[TOOL_START]", "[TOOL_END]", "[SEARCH_START]", "[SEARCH_RESULT]")):
-                    yield event
-                else:
-                    full_reply.append(event)
-                    yield event
-        finally:
-            await mapper.add_message(
-                conversation_uid, "assistant", "".join(full_reply),
-                sources=sources_data,
-                tool_calls=tool_calls_data,
+            fast_reply = self._match_fast_reply(content, images, attachments)
+            if fast_reply is not None:
+                await mapper.add_messages(conversation_uid, [
+                    {"role": "user", "content": content},
+                    {"role": "assistant", "content": fast_reply},
+                ])
+                self._append_history(conversation_uid, "user", content)
+                self._append_history(conversation_uid, "assistant", fast_reply)
+                yield fast_reply
+                return
+
+            react_agent = self._get_react_agent(request, model_id)
+            kb_mapper = self._get_kb_mapper(request)
+            validated_attachments, selected_files_context = self._prepare_dataset_attachments(
+                attachments, user_id=user_id, user_role=user_role
             )
+
+            history = await self._load_history(mapper, conversation_uid, react_agent.config.history_window)
+            await mapper.add_message(conversation_uid, "user", content, validated_attachments)
+            self._append_history(conversation_uid, "user", content)
+
+            full_reply: List[str] = []
+            try:
+                async for event in react_agent.stream(
+                    content,
+                    history,
+                    kb_mapper=kb_mapper,
+                    images=images,
+                    user_id=user_id,
+                    user_role=user_role,
+                    selected_files_context=selected_files_context,
+                ):
+                    if event.startswith(("[SOURCES]", "[TOOL_START]", "[TOOL_END]", "[SEARCH_START]", "[SEARCH_RESULT]")):
+                        yield event
+                    else:
+                        full_reply.append(event)
+                        yield event
+            finally:
+                reply = "".join(full_reply)
+                await mapper.add_message(
+                    conversation_uid, "assistant", reply,
+                    sources=react_agent.last_sources,
+                    tool_calls=react_agent.last_tool_calls,
+                )
+                self._append_history(conversation_uid, "assistant", reply)
+        except BaseException:
+            self._discard_history(conversation_uid)
+            raise
@@ -8,6 +8,7 @@ Embedding 模型：通过 OpenAI-compatible API 调用（默认指向 LM Studio
   EMBEDDING_MODEL      嵌入模型名称，默认 qwen3-embedding:8b
   EMBEDDING_API_BASE   embedding 服务地址，默认 http://localhost:11434/v1（Ollama）
   EMBEDDING_API_KEY    API key，默认 ollama
+  EMBEDDING_WORKERS    文档入库（提取/OCR/embedding）专用线程数，默认 2
 """
 from __future__ import annotations
 
@@ -15,6 +16,9 @@ import asyncio
 import logging
 import os
 import pathlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from typing import List
 
@@ -50,6 +54,28 @@ def _get_embeddings():
     return _embeddings_instance
 
 
+_chroma_client = None
+_chroma_lock = threading.Lock()
+
+# 文档入库可能跑 OCR + 大批量 embedding，耗时以分钟计；放到专用线程池，
+# 避免占满默认线程池，拖慢检索和其他 to_thread 调用
+_embed_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EMBEDDING_WORKERS", "2")),
+    thread_name_prefix="kb-embed",
+)
+
+
+def _get_chroma_client():
+    """进程内共享一个 Chroma PersistentClient（底层为 SQLite），避免每次检索都重新打开。"""
+    global _chroma_client
+    if _chroma_client is None:
+        with _chroma_lock:
+            if _chroma_client is None:
+                import chromadb
+                _chroma_client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+    return _chroma_client
+
+
 def _extract_text(file_path: pathlib.Path) -> str:
     suffix = file_path.suffix.lower()
     if suffix == ".pdf":
@@ -229,20 +255,30 @@ def _extract_excel_chunks(path: pathlib.Path) -> List[str]:
     return chunks
 
 
+# _clean_text 会处理整篇文档，正则在模块加载时编译一次
+_CJK_SPACE_RE = re.compile(r'(?<=[\u4e00-\u9fff\uff00-\uffef])\s+(?=[\u4e00-\u9fff\uff00-\uffef])')
+_CJK_PUNCT_SPACE_RE = re.compile(r'(?<=[\u4e00-\u9fff])\s+(?=[，。！？；：、""''（）【】《》])')
+_PUNCT_CJK_SPACE_RE = re.compile(r'(?<=[，。！？；：、""''（）【】《》])\s+(?=[\u4e00-\u9fff])')
+_DECIMAL_SPACE_RE = re.compile(r'(\d)\s+\.\s+(\d)')
+_PERCENT_SPACE_RE = re.compile(r'(\d)\s+%')
+_FRACTION_SPACE_RE = re.compile(r'(\d)\s+/\s+(\d)')
+_PAGE_NUMBER_RE = re.compile(r'(?m)^\s*\d{1,4}\s*$')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
 def _clean_text(text: str) -> str:
     """清理 PDF 提取文本的常见噪声：中文字符间空格、重复段落。"""
-    import re
     # 1. 去除中文字符之间的空格（排版 PDF 常见问题）
-    text = re.sub(r'(?<=[\u4e00-\u9fff\uff00-\uffef])\s+(?=[\u4e00-\u9fff\uff00-\uffef])', '', text)
+    text = _CJK_SPACE_RE.sub('', text)
     # 2. 去除中文字符与标点之间的空格
-    text = re.sub(r'(?<=[\u4e00-\u9fff])\s+(?=[，。！？；：、""''（）【】《》])', '', text)
-    text = re.sub(r'(?<=[，。！？；：、""''（）【】《》])\s+(?=[\u4e00-\u9fff])', '', text)
+    text = _CJK_PUNCT_SPACE_RE.sub('', text)
+    text = _PUNCT_CJK_SPACE_RE.sub('', text)
     # 3. 修复数字中的空格：数字 . 数字 → 数字.数字，数字 % → 数字%
-    text = re.sub(r'(\d)\s+\.\s+(\d)', r'\1.\2', text)
-    text = re.sub(r'(\d)\s+%', r'\1%', text)
-    text = re.sub(r'(\d)\s+/\s+(\d)', r'\1/\2', text)
+    text = _DECIMAL_SPACE_RE.sub(r'\1.\2', text)
+    text = _PERCENT_SPACE_RE.sub(r'\1%', text)
+    text = _FRACTION_SPACE_RE.sub(r'\1/\2', text)
     # 4. 去除独立页码行（单独一行只有数字，且数字在 1~9999 之间）
-    text = re.sub(r'(?m)^\s*\d{1,4}\s*$', '', text)
+    text = _PAGE_NUMBER_RE.sub('', text)
     # 5. 去除重复段落（相同的行出现超过 1 次则去重）
     paragraphs = text.split('\n')
     seen: dict[str, int] = {}
@@ -257,7 +293,7 @@ def _clean_text(text: str) -> str:
             deduped.append(p)
         seen[key] = count + 1
     # 合并多余空行
-    result = re.sub(r'\n{3,}', '\n\n', '\n'.join(deduped))
+    result = _BLANK_LINES_RE.sub('\n\n', '\n'.join(deduped))
     return result
 
 
@@ -300,7 +336,7 @@ def _embed_sync(
     vectorstore = Chroma(
         collection_name=f"kb_{kb_id}",
         embedding_function=_get_embeddings(),
-        persist_directory=str(CHROMA_DIR),
+        client=_get_chroma_client(),
     )
     vectorstore.add_texts(texts=chunks, metadatas=metadatas, ids=ids)
 
@@ -309,8 +345,7 @@ def _embed_sync(
 
 
 def _delete_doc_sync(doc_id: int, kb_id: int) -> None:
-    import chromadb
-    client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+    client = _get_chroma_client()
     try:
         collection = client.get_collection(f"kb_{kb_id}")
     except Exception:
@@ -326,8 +361,7 @@ def _delete_doc_sync(doc_id: int, kb_id: int) -> None:
 
 def _delete_kb_sync(kb_id: int) -> None:
     try:
-        import chromadb
-        client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+        client = _get_chroma_client()
         client.delete_collection(f"kb_{kb_id}")
         logger.info("deleted chroma collection kb_%d", kb_id)
     except Exception as exc:
@@ -339,7 +373,7 @@ def _search_sync(kb_id: int, query: str, top_k: int) -> List[dict]:
     vectorstore = Chroma(
         collection_name=f"kb_{kb_id}",
         embedding_function=_get_embeddings(),
-        persist_directory=str(CHROMA_DIR),
+        client=_get_chroma_client(),
     )
     docs_and_scores = vectorstore.similarity_search_with_score(query, k=top_k)
     return [
@@ -372,18 +406,18 @@ class EmbeddingService:
         chunk_overlap: int = _CHUNK_OVERLAP,
     ) -> int:
         """返回生成的 chunk 数量。"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
-            None,
+            _embed_executor,
             partial(_embed_sync, doc_id, kb_id, file_path, chunk_size, chunk_overlap),
         )
 
     async def delete_document_embeddings(self, doc_id: int, kb_id: int) -> None:
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         await loop.run_in_executor(None, partial(_delete_doc_sync, doc_id, kb_id))
 
     async def delete_kb_embeddings(self, kb_id: int) -> None:
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         await loop.run_in_executor(None, partial(_delete_kb_sync, kb_id))
 
     async def search(
@@ -393,7 +427,7 @@ class EmbeddingService:
         top_k: int = 5,
     ) -> List[dict]:
         """语义检索，返回 [{content, score, doc_id, chunk_index}, ...]。"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
             None,
             partial(_search_sync, kb_id, query, top_k),
@@ -16,6 +16,23 @@ from src.server_agent.model import FileInfo, FileListVO
 
 logger = logging.getLogger(__name__)
 
+# 扩展名 -> 内容类型（列目录时每个文件都会查询，模块级只构建一次）
+CONTENT_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.csv': 'text/csv',
+    '.txt': 'text/plain',
+    '.json': 'application/json',
+    '.pdf': 'application/pdf',
+    '.dcm': 'application/dicom',
+    '.DCM': 'application/dicom',
+    '.nii': 'application/nifti',
+    '.nii.gz': 'application/nifti'
+}
+
 
 class FileService:
     """文件服务类"""
@@ -748,28 +765,12 @@ class FileService:
     @staticmethod
     def _get_content_type(filename_or_ext: str) -> str:
         """根据文件扩展名获取内容类型"""
-        content_types = {
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-            '.gif': 'image/gif',
-            '.webp': 'image/webp',
-            '.csv': 'text/csv',
-            '.txt': 'text/plain',
-            '.json': 'application/json',
-            '.pdf': 'application/pdf',
-            '.dcm': 'application/dicom',
-            '.DCM': 'application/dicom',
-            '.nii': 'application/nifti',
-            '.nii.gz': 'application/nifti'
-        }
-        
         # 处理复合扩展名 (如 .nii.gz)
         ext = filename_or_ext.lower()
         if ext.endswith('.nii.gz'):
-            return content_types['.nii.gz']
+            return CONTENT_TYPES['.nii.gz']
         
-        return content_types.get(ext, 'application/octet-stream')
+        return CONTENT_TYPES.get(ext, 'application/octet-stream')
 
     @staticmethod
     def _get_safe_path(root_dir: pathlib.Path, path: str) -> pathlib.Path:
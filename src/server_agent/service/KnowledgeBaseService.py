@@ -225,8 +225,7 @@ class KnowledgeBaseService:
             if chunk_overlap is not None:
                 kwargs["chunk_overlap"] = chunk_overlap
             count = await self.embedding.embed_document(doc_id, kb_id, file_path, **kwargs)
-            await self.mapper.update_document_chunk_count(doc_id, count)
-            await self.mapper.update_document_status(doc_id, "completed")
+            await self.mapper.update_document_result(doc_id, count, "completed")
             logger.info(f"Embedding done: doc {doc_id}, {count} chunks")
         except Exception as exc:
             logger.error(f"Embedding failed for doc {doc_id}: {exc}")
@@ -5,6 +5,7 @@ SkillRegistryService - 全局技能仓库管理
 1. 启动时扫描 GLOBAL_SKILLS_DIR，将未注册技能同步到 global_skills 表
 2. 处理用户上传的 zip 包，解压并注册到 DB
 """
+import asyncio
 import logging
 import os
 import re
@@ -12,7 +13,9 @@ import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 import zipfile
+from collections import OrderedDict
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Optional
 
@@ -35,18 +38,78 @@ STANDARD_WRAPPER_ARGS = (
 )
 
 
+# SKILL.md front matter 与其中的 key: value 行
+_FRONT_MATTER_RE = re.compile(r"^---\s*\n(.*?)\n---", re.DOTALL)
+_META_LINE_RE = re.compile(r"^([^:\n]*):(.*)$", re.MULTILINE)
+
+# wrapper --help 的输出缓存。wrapper 会导入技能目录下的其他模块，所以按 (wrapper 路径, 技能目录内最新 mtime)
+# 判断是否失效；技能列表每次都会校验全部技能，不缓存就要为每个技能各起一次 Python 解释器。
+# 技能列表在多个 to_thread 线程里并发校验，读写缓存需加锁
+WRAPPER_HELP_CACHE_SIZE = 256
+_wrapper_help_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_wrapper_help_lock = threading.Lock()
+
+
+def _newest_mtime_ns(root: Path) -> int:
+    """目录树内（含目录自身，不含 __pycache__）最新的 mtime_ns；增删改文件都会反映出来"""
+    newest = root.stat().st_mtime_ns
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    # --help 运行时自己会写 __pycache__，不计入
+                    if entry.name == "__pycache__":
+                        continue
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if st.st_mtime_ns > newest:
+                        newest = st.st_mtime_ns
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return newest
+
+
+def _wrapper_help(wrapper_path: Path, skill_dir: Path) -> tuple[int, str]:
+    """返回 (returncode, stdout+stderr)，wrapper 及技能目录都未变化时复用上次结果"""
+    key = str(wrapper_path)
+    wrapper_stat = wrapper_path.stat()
+    # wrapper 可能不在技能目录内，单独计入其签名
+    signature = (_newest_mtime_ns(skill_dir), wrapper_stat.st_mtime_ns, wrapper_stat.st_size)
+    with _wrapper_help_lock:
+        cached = _wrapper_help_cache.get(key)
+        if cached and cached[0] == signature:
+            _wrapper_help_cache.move_to_end(key)
+            return cached[1], cached[2]
+
+    help_result = subprocess.run(
+        [sys.executable, str(wrapper_path), "--help"],
+        cwd=str(skill_dir),
+        text=True,
+        capture_output=True,
+        timeout=10,
+    )
+    help_text = f"{help_result.stdout}\n{help_result.stderr}"
+    with _wrapper_help_lock:
+        _wrapper_help_cache[key] = (signature, help_result.returncode, help_text)
+        _wrapper_help_cache.move_to_end(key)
+        if len(_wrapper_help_cache) > WRAPPER_HELP_CACHE_SIZE:
+            _wrapper_help_cache.popitem(last=False)
+    return help_result.returncode, help_text
+
+
 def _parse_skill_md(skill_md: Path) -> dict:
     """解析 SKILL.md 的 YAML front matter，返回 key-value 字典"""
     try:
         text = skill_md.read_text(encoding="utf-8")
-        m = re.match(r"^---\s*\n(.*?)\n---", text, re.DOTALL)
-        meta: dict = {}
-        if m:
-            for line in m.group(1).splitlines():
-                if ":" in line:
-                    k, v = line.split(":", 1)
-                    meta[k.strip()] = v.strip()
-        return meta
+        m = _FRONT_MATTER_RE.match(text)
+        if not m:
+            return {}
+        return {k.strip(): v.strip() for k, v in _META_LINE_RE.findall(m.group(1))}
     except Exception:
         return {}
 
@@ -252,16 +315,9 @@ class SkillRegistryService:
 
         if wrapper_path and wrapper_path.is_file():
             try:
-                help_result = subprocess.run(
-                    [sys.executable, str(wrapper_path), "--help"],
-                    cwd=str(skill_dir),
-                    text=True,
-                    capture_output=True,
-                    timeout=10,
-                )
-                help_text = f"{help_result.stdout}\n{help_result.stderr}"
-                if help_result.returncode not in {0, 1}:
-                    warnings.append(f"Wrapper --help returned {help_result.returncode}.")
+                returncode, help_text = _wrapper_help(wrapper_path, skill_dir)
+                if returncode not in {0, 1}:
+                    warnings.append(f"Wrapper --help returned {returncode}.")
                 for arg in STANDARD_WRAPPER_ARGS:
                     if arg not in help_text:
                         errors.append(f"Wrapper help does not expose standard argument: {arg}")
@@ -280,21 +336,31 @@ class SkillRegistryService:
         tmp_root = Path(tmpdir).resolve()
 
         with zipfile.ZipFile(zip_path, "r") as zf:
-            names = zf.namelist()
-            roots = {n.split("/")[0] for n in names if n.strip("/")}
+            # 一次遍历成员，同时收集顶层目录、SKILL.md 位置和越界路径，按原顺序报错
+            roots: set[str] = set()
+            skill_md_roots: set[str] = set()
+            unsafe_path = False
+            for member in zf.infolist():
+                name = member.filename
+                if name.strip("/"):
+                    top, _, rest = name.partition("/")
+                    roots.add(top)
+                    if rest == "SKILL.md":
+                        skill_md_roots.add(top)
+                if not unsafe_path:
+                    try:
+                        (tmp_root / name).resolve().relative_to(tmp_root)
+                    except ValueError:
+                        unsafe_path = True
+
             if len(roots) != 1:
                 raise ValueError("zip 包必须包含且仅包含一个顶层目录作为 skill slug")
 
             root = roots.pop()
-            if f"{root}/SKILL.md" not in names:
+            if root not in skill_md_roots:
                 raise ValueError("zip 包中未找到 SKILL.md，不是有效的 Skill 包")
-
-            for member in zf.infolist():
-                target = (tmp_root / member.filename).resolve()
-                try:
-                    target.relative_to(tmp_root)
-                except ValueError as exc:
-                    raise ValueError("zip 包包含非法路径") from exc
+            if unsafe_path:
+                raise ValueError("zip 包包含非法路径")
             zf.extractall(tmpdir)
         return Path(tmpdir) / root
 
@@ -346,7 +412,7 @@ class SkillRegistryService:
 
         with tempfile.TemporaryDirectory() as tmpdir:
             extracted = self._extract_uploaded_zip(zip_bytes, tmpdir)
-            validation = self.validate_skill_dir(extracted)
+            validation = await asyncio.to_thread(self.validate_skill_dir, extracted)
             if validation.get("errors"):
                 raise ValueError("Skill 包校验失败: " + "; ".join(validation["errors"]))
 
@@ -369,7 +435,7 @@ class SkillRegistryService:
             storage_path=str(dst),
             user_id=user_id,
         )
-        record["validation"] = self.validate_skill_dir(dst)
+        record["validation"] = await asyncio.to_thread(self.validate_skill_dir, dst)
         record["skill_level"] = record["validation"].get("skill_level")
         record["valid_patient_skill"] = record["validation"].get("valid_patient_skill")
         record["pipeline_ready"] = record["validation"].get("pipeline_ready")
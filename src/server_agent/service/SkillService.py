@@ -8,6 +8,17 @@ import re
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 import asyncio
+from collections import OrderedDict
+
+
+# SKILL.md front matter（含正文）与其中的 key: value 行
+_FRONT_MATTER_RE = re.compile(r'^---\s*\n(.*?)\n---\s*\n(.*)$', re.DOTALL)
+_META_LINE_RE = re.compile(r'^([^:\n]*):(.*)$', re.MULTILINE)
+
+# SKILL.md 解析结果缓存：path -> (mtime_ns, size, parsed)
+# 列表/类型/详情接口每次都会重新扫描所有技能，文件未变化时直接复用解析结果
+SKILL_MD_CACHE_SIZE = 512
+_skill_md_cache: "OrderedDict[str, tuple]" = OrderedDict()
 
 
 class SkillService:
@@ -45,11 +56,17 @@ class SkillService:
             解析后的 skill 信息字典
         """
         try:
+            stat = skill_path.stat()
+            key = str(skill_path)
+            cached = _skill_md_cache.get(key)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                return cached[2]
+
             with open(skill_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
             # 解析 YAML front matter
-            yaml_match = re.match(r'^---\s*\n(.*?)\n---\s*\n(.*)$', content, re.DOTALL)
+            yaml_match = _FRONT_MATTER_RE.match(content)
             if not yaml_match:
                 return None
             
@@ -57,11 +74,7 @@ class SkillService:
             markdown_content = yaml_match.group(2).strip()
             
             # 简单解析 YAML（只处理基本的 key: value 格式）
-            metadata = {}
-            for line in yaml_content.split('\n'):
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    metadata[key.strip()] = value.strip()
+            metadata = {key.strip(): value.strip() for key, value in _META_LINE_RE.findall(yaml_content)}
             
             # 提取第一段作为简短描述
             description = metadata.get('description', '')
@@ -76,12 +89,16 @@ class SkillService:
                         full_description = para.strip()
                         break
             
-            return {
+            parsed = {
                 'metadata': metadata,
                 'description': description,
                 'full_description': full_description,
                 'markdown_content': markdown_content
             }
+            _skill_md_cache[key] = (stat.st_mtime_ns, stat.st_size, parsed)
+            if len(_skill_md_cache) > SKILL_MD_CACHE_SIZE:
+                _skill_md_cache.popitem(last=False)
+            return parsed
             
         except Exception as e:
             print(f"解析 SKILL.md 失败: {skill_path}, 错误: {e}")
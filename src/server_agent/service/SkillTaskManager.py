@@ -24,7 +24,16 @@ from typing import Dict, List, Literal, Optional
 logger = logging.getLogger(__name__)
 
 SkillStatus = Literal["running", "success", "failed", "cancelled"]
-TERMINAL_STATUSES = {"success", "failed", "cancelled"}
+VALID_STATUSES = frozenset({"running", "success", "failed", "cancelled"})
+TERMINAL_STATUSES = frozenset({"success", "failed", "cancelled"})
+# 任务状态落库前的合并窗口（秒）：窗口内同一任务的多次变更只写一次，多个任务一次批量写入
+PERSIST_FLUSH_DELAY = 0.05
+
+
+def _has_placeholder(value) -> bool:
+    """路径参数里是否残留未展开的 shell 变量 / 模板占位符（$RUN_DIR、{patient_dir}）"""
+    text = str(value)
+    return "$" in text or "{" in text or "}" in text
 
 
 @dataclass
@@ -63,9 +72,10 @@ class SkillTask:
             manifest_path = str(Path(run_dir) / "manifest.json") if run_dir else None
         if not manifest_path:
             return None
-        if "$" in str(manifest_path) or "{" in str(manifest_path) or "}" in str(manifest_path):
+        manifest_path = str(manifest_path)
+        if _has_placeholder(manifest_path):
             return None
-        path = Path(str(manifest_path))
+        path = Path(manifest_path)
         if not path.is_file():
             return None
         try:
@@ -80,7 +90,7 @@ class SkillTask:
             return False
         for key in ("manifest_path", "run_dir"):
             value = self.params.get(key)
-            if value and any(token in str(value) for token in ("$", "{", "}")):
+            if value and _has_placeholder(value):
                 return True
         return False
 
@@ -98,7 +108,10 @@ class SkillTask:
         The manifest is the source of truth for medical Skill tasks. This keeps
         DB persistence aligned with the file that wrappers continuously update.
         """
-        manifest = self._read_manifest()
+        return self._apply_manifest(self._read_manifest())
+
+    def _apply_manifest(self, manifest: Optional[dict]) -> bool:
+        """用已读取的 manifest 更新内存状态，返回状态是否发生变化"""
         if not manifest:
             if self._is_unbound_standard_runner_task():
                 self.status = "failed"
@@ -116,7 +129,7 @@ class SkillTask:
         marker_changed = False
 
         manifest_status = manifest.get("status")
-        self.status = manifest_status if manifest_status in ("running", "success", "failed", "cancelled") else "running"
+        self.status = manifest_status if manifest_status in VALID_STATUSES else "running"
 
         started_at = self._parse_datetime(manifest.get("started_at"))
         if started_at:
@@ -147,10 +160,11 @@ class SkillTask:
         return before != (self.status, self.started_at, self.finished_at, self.error) or marker_changed
 
     def to_dict(self) -> dict:
-        self.refresh_from_manifest()
+        # 只读一次 manifest，同时用于刷新状态和组装返回结果
         manifest = self._read_manifest()
+        self._apply_manifest(manifest)
         manifest_status = manifest.get("status") if manifest else None
-        status = manifest_status if manifest_status in ("running", "success", "failed", "cancelled") else self.status
+        status = manifest_status if manifest_status in VALID_STATUSES else self.status
         progress_payload = manifest.get("progress") if manifest else None
         if isinstance(progress_payload, dict) and progress_payload.get("total"):
             total = progress_payload.get("total") or 0
@@ -208,6 +222,8 @@ class SkillTaskManager:
     def __init__(self):
         self._tasks: Dict[str, SkillTask] = {}
         self._mapper = None  # 延迟初始化，避免循环导入
+        self._dirty: Dict[str, SkillTask] = {}  # 待落库的任务
+        self._flush_task: Optional[asyncio.Task] = None
 
     def _get_mapper(self):
         """延迟获取 mapper，避免模块循环导入"""
@@ -246,7 +262,7 @@ class SkillTaskManager:
             if not value:
                 return None
             text = str(value)
-            if "$" in text or "{" in text or "}" in text:
+            if _has_placeholder(text):
                 return None
             return text
 
@@ -272,36 +288,44 @@ class SkillTaskManager:
         return payload
 
     def _persist(self, task: SkillTask):
-        """异步写 DB，不阻塞调用方"""
+        """异步写 DB，不阻塞调用方；短时间内的多次写入合并为一次批量 upsert"""
         try:
             asyncio.get_running_loop()
-            asyncio.create_task(self._persist_async(task))
         except RuntimeError:
-            pass  # 没有运行中的事件循环，跳过
-        except Exception as e:
-            logger.warning(f"[SkillTaskManager] persist schedule failed: {e}")
-
-    async def _persist_async(self, task: SkillTask):
-        """将任务状态写入 DB"""
-        try:
-            mapper = self._get_mapper()
-            snapshot = task.to_dict()
-            await mapper.upsert_skill_task({
-                "task_id": task.task_id,
-                "skill_name": task.skill_name,
-                "params": task.params,
-                "conversation_id": task.conversation_id,
-                "status": snapshot["status"],
-                "progress": snapshot.get("progress", 0),
-                "created_at": task.created_at,
-                "started_at": task.started_at,
-                "finished_at": task.finished_at,
-                "error": task.error,
-                "output": snapshot.get("output"),
-                "cancelled": snapshot["status"] == "cancelled",
-            })
-        except Exception as e:
-            logger.warning(f"[SkillTaskManager] DB persist failed for {task.task_id}: {e}")
+            return  # 没有运行中的事件循环，跳过
+        self._dirty[task.task_id] = task
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_dirty())
+
+    async def _flush_dirty(self):
+        """等待合并窗口后，把积累的任务一次写入 DB；写入期间的新变更在下一轮写入"""
+        await asyncio.sleep(PERSIST_FLUSH_DELAY)
+        while self._dirty:
+            batch = list(self._dirty.values())
+            self._dirty.clear()
+            try:
+                rows = []
+                for task in batch:
+                    snapshot = task.to_dict()
+                    rows.append({
+                        "task_id": task.task_id,
+                        "skill_name": task.skill_name,
+                        "params": task.params,
+                        "conversation_id": task.conversation_id,
+                        "status": snapshot["status"],
+                        "progress": snapshot.get("progress", 0),
+                        "created_at": task.created_at,
+                        "started_at": task.started_at,
+                        "finished_at": task.finished_at,
+                        "error": task.error,
+                        "output": snapshot.get("output"),
+                        "cancelled": snapshot["status"] == "cancelled",
+                    })
+                await self._get_mapper().upsert_skill_tasks(rows)
+            except Exception as e:
+                logger.warning(
+                    f"[SkillTaskManager] DB persist failed for {[t.task_id for t in batch]}: {e}"
+                )
 
     async def restore_from_db(self, mark_interrupted: bool = True):
         """从 DB 恢复任务列表（跳过已在内存中的任务）。
@@ -390,8 +414,7 @@ class SkillTaskManager:
             if value is None:
                 continue
             if key in {"run_dir", "manifest_path", "patient_context"}:
-                text = str(value)
-                if "$" in text or "{" in text or "}" in text:
+                if _has_placeholder(value):
                     continue
             clean_params[key] = value
 
@@ -419,7 +442,7 @@ class SkillTaskManager:
         run_dir = task.params.get("run_dir") if isinstance(task.params, dict) else None
         if not manifest_path and run_dir:
             manifest_path = str(Path(run_dir) / "manifest.json")
-        if not manifest_path or any(token in str(manifest_path) for token in ("$", "{", "}")):
+        if not manifest_path or _has_placeholder(manifest_path):
             return None
         return Path(str(manifest_path))
 
@@ -429,7 +452,7 @@ class SkillTaskManager:
             manifest_path = self._resolve_manifest_path(task)
             if manifest_path:
                 run_dir = str(manifest_path.parent)
-        if not run_dir or any(token in str(run_dir) for token in ("$", "{", "}")):
+        if not run_dir or _has_placeholder(run_dir):
             return None
         return Path(str(run_dir))
 
@@ -515,6 +538,7 @@ class SkillTaskManager:
         if task_id not in self._tasks:
             return False
         self._tasks.pop(task_id, None)
+        self._dirty.pop(task_id, None)
         try:
             asyncio.get_running_loop()
             asyncio.create_task(self._get_mapper().delete_skill_task(task_id))
@@ -579,6 +603,7 @@ class SkillTaskManager:
             if only_finished and task.status not in TERMINAL_STATUSES:
                 continue
             self._tasks.pop(tid, None)
+            self._dirty.pop(tid, None)
             removed_ids.append(tid)
             removed += 1
         # 批量从 DB 删除
@@ -5,7 +5,9 @@ from __future__ import annotations
 
 import pathlib
 import logging
-from typing import Optional
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 
 from src.server_agent.exceptions import (
     ValidationError, ConflictError, NotFoundError,
@@ -17,6 +19,18 @@ from src.server_agent.constants.CommonConstants import DATASET_PATH
 
 logger = logging.getLogger(__name__)
 
+# token -> (过期时间, UserVO)。每个鉴权请求都会查 token，进程内短时缓存以免每次访问 SQLite；
+# 模块级共享，保证各 UserService 实例在登录/改资料时的失效对彼此可见
+TOKEN_CACHE_TTL = 60.0
+TOKEN_CACHE_SIZE = 1024
+_token_cache: "OrderedDict[str, Tuple[float, UserVO]]" = OrderedDict()
+
+
+def _invalidate_user_tokens(uid: int) -> None:
+    """移除某个用户的全部 token 缓存（登录换 token、修改资料后调用）"""
+    for token in [t for t, (_, vo) in _token_cache.items() if vo.uid == uid]:
+        _token_cache.pop(token, None)
+
 
 class UserService:
     """用户服务类"""
@@ -113,6 +127,7 @@ class UserService:
                 operation="update_user_token",
                 context={"uid": user_row.uid}
             )
+        _invalidate_user_tokens(user_row.uid)
         return token
 
     @handle_service_exception
@@ -129,6 +144,14 @@ class UserService:
         if not token:
             return None
 
+        cached = _token_cache.get(token)
+        if cached is not None:
+            expires_at, user_vo = cached
+            if expires_at > time.monotonic():
+                _token_cache.move_to_end(token)
+                return user_vo
+            _token_cache.pop(token, None)
+
         user_row = await self.userMapper.find_user_by_token(token)
         if user_row:
             # 确保role字段不为None
@@ -136,13 +159,17 @@ class UserService:
             if role_value is None:
                 role_value = 'user'
                 
-            return UserVO(
+            user_vo = UserVO(
                 uid=user_row.uid,
                 user_name=user_row.user_name,
                 token=user_row.token,
                 role=role_value,
                 avatar=getattr(user_row, 'avatar', None)
             )
+            _token_cache[token] = (time.monotonic() + TOKEN_CACHE_TTL, user_vo)
+            if len(_token_cache) > TOKEN_CACHE_SIZE:
+                _token_cache.popitem(last=False)
+            return user_vo
         return None
 
     @handle_service_exception
@@ -164,7 +191,9 @@ class UserService:
                 context={"uid": uid}
             )
 
-        return await self.userMapper.update_user_info(uid, user_name, password)
+        updated = await self.userMapper.update_user_info(uid, user_name, password)
+        _invalidate_user_tokens(uid)
+        return updated
 
     @handle_service_exception
     async def update_user_profile(self, uid: int, user_name: str, avatar: Optional[str] = None) -> UserVO:
@@ -202,6 +231,8 @@ class UserService:
                 context={"uid": uid, "user_name": user_name}
             )
 
+        _invalidate_user_tokens(uid)
+
         # 获取更新后的用户信息
         updated_user = await self.userMapper.find_user_by_uid(uid)
         if not updated_user:
@@ -20,7 +20,6 @@ from src.server_agent.mapper.CodeAgentMapper import CodeAgentMapper
 from src.server_agent.model.entity.CodeAgentConversation import (
     ConversationDetail,
     ConversationInfo,
-    CodeAgentConversation
 )
 
 logger = logging.getLogger(__name__)
@@ -29,6 +28,26 @@ logger = logging.getLogger(__name__)
 # Task 独立于 SSE 连接运行，SSE 断流后 Claude 进程继续写 JSONL
 _background_tasks: Dict[str, asyncio.Task] = {}
 
+# Claude 事件 kind -> 推给前端的 SSE type
+KIND_EVENT_TYPES: Dict[str, str] = {
+    MessageKind.STREAM_DELTA: "text",
+    MessageKind.THINKING: "thinking",
+    MessageKind.SESSION_CREATED: "session_created",
+    MessageKind.COMPLETE: "done",
+    MessageKind.ERROR: "error",
+    MessageKind.TOOL_USE: "tool_use",
+    MessageKind.PERMISSION_REQUEST: "permission_request",
+    MessageKind.USER_QUESTION_REQUEST: "user_question_request",
+    "skill_submitted": "skill_submitted",
+}
+# 需要记录日志的事件 -> (日志前缀, 取值字段)
+KIND_LOG_FIELDS: Dict[str, Tuple[str, str]] = {
+    MessageKind.TOOL_USE: ("Tool use: ", "toolName"),
+    MessageKind.PERMISSION_REQUEST: ("Permission request: ", "toolName"),
+    MessageKind.USER_QUESTION_REQUEST: ("User question request: ", "requestId"),
+    "skill_submitted": ("Skill submitted: task=", "taskId"),
+}
+
 
 def is_conversation_active(conversation_id: str) -> bool:
     """检查指定会话的 Claude 后台任务是否仍在运行"""
@@ -110,17 +129,17 @@ class CodeAgentService:
             本 Task 不受 SSE 连接生命周期影响，SSE 断开后继续运行直到完成。
             """
             try:
-                async for chunk_json in code_agent.stream_chat(
+                async for chunk_data in code_agent.stream_chat(
                     current_message, sdk_session_id, user_id=user_id,
                     conversation_id=conversation_id
                 ):
-                    await queue.put(chunk_json)
+                    await queue.put(chunk_data)
             except asyncio.CancelledError:
                 logger.info(f"[Worker] Explicitly cancelled: {conversation_id}")
                 raise
             except Exception as e:
                 logger.error(f"[Worker] Error for {conversation_id}: {e}")
-                await queue.put(json.dumps({"kind": "error", "content": str(e), "isError": True}))
+                await queue.put({"kind": "error", "content": str(e), "isError": True})
             finally:
                 await queue.put(None)  # 哨兵，通知 SSE 生成器结束
                 _background_tasks.pop(conversation_id, None)
@@ -134,25 +153,23 @@ class CodeAgentService:
             full_content = ""
             while True:
                 try:
-                    chunk_json = await asyncio.wait_for(queue.get(), timeout=55.0)
+                    chunk_data = await asyncio.wait_for(queue.get(), timeout=55.0)
                 except asyncio.TimeoutError:
                     # 发送 keep-alive ping 防止代理超时断连
                     yield f"data: {json.dumps({'kind': 'ping'})}\n\n"
                     continue
 
-                if chunk_json is None:  # 后台 Task 已完成
+                if chunk_data is None:  # 后台 Task 已完成
                     break
 
-                chunk_data = json.loads(chunk_json)
                 kind = chunk_data.get("kind", "")
+                event_type = KIND_EVENT_TYPES.get(kind)
+                if event_type:
+                    chunk_data["type"] = event_type
 
                 if kind == MessageKind.STREAM_DELTA:
                     full_content += chunk_data.get("content", "")
-                    chunk_data["type"] = "text"
-                elif kind == MessageKind.THINKING:
-                    chunk_data["type"] = "thinking"
                 elif kind == MessageKind.SESSION_CREATED:
-                    chunk_data["type"] = "session_created"
                     init_session_id = chunk_data.get("sessionId") or chunk_data.get("newSessionId")
                     if init_session_id:
                         logger.info(f"[CodeAgentService] SDK session created: {init_session_id}")
@@ -161,22 +178,10 @@ class CodeAgentService:
                             existing.session_id = init_session_id
                     chunk_data["conversation_id"] = conversation_id
                 elif kind == MessageKind.COMPLETE:
-                    chunk_data["type"] = "done"
                     chunk_data["conversation_id"] = conversation_id
-                elif kind == MessageKind.ERROR:
-                    chunk_data["type"] = "error"
-                elif kind == MessageKind.TOOL_USE:
-                    chunk_data["type"] = "tool_use"
-                    logger.info(f"[CodeAgentService] Tool use: {chunk_data.get('toolName')}")
-                elif kind == MessageKind.PERMISSION_REQUEST:
-                    chunk_data["type"] = "permission_request"
-                    logger.info(f"[CodeAgentService] Permission request: {chunk_data.get('toolName')}")
-                elif kind == MessageKind.USER_QUESTION_REQUEST:
-                    chunk_data["type"] = "user_question_request"
-                    logger.info(f"[CodeAgentService] User question request: {chunk_data.get('requestId')}")
-                elif kind == "skill_submitted":
-                    chunk_data["type"] = "skill_submitted"
-                    logger.info(f"[CodeAgentService] Skill submitted: task={chunk_data.get('taskId')}")
+                elif kind in KIND_LOG_FIELDS:
+                    label, field = KIND_LOG_FIELDS[kind]
+                    logger.info(f"[CodeAgentService] {label}{chunk_data.get(field)}")
 
                 yield f"data: {json.dumps(chunk_data, ensure_ascii=False)}\n\n"
 
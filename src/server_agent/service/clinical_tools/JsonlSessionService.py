@@ -4,10 +4,8 @@ JSONL Session Service - 读取 Claude SDK 的 JSONL 文件
 对标参考项目 claudecodeui 的 projects.js
 Claude SDK 会话历史存储在 ~/.claude/projects/{project_name}/{session_id}.jsonl
 """
-import asyncio
 import json
 import logging
-import os
 import re
 from pathlib import Path
 from typing import List, Optional, Tuple
@@ -438,6 +438,17 @@ def render_html(conv: ExportConversation, messages: List[ExportMessage]) -> str:
 
 # ─── 调度入口 ─────────────────────────────────────────────────────────────────
 
+# 导出格式查找表，模块加载时构建一次
+_RENDERERS = {
+    "markdown": render_markdown,
+    "json": render_json,
+    "html": render_html,
+}
+_SUPPORTED_FORMATS = list(_RENDERERS)
+_MIME_TYPES = {"markdown": "text/markdown", "json": "application/json", "html": "text/html"}
+_FILE_EXTENSIONS = {"markdown": ".md", "json": ".json", "html": ".html"}
+
+
 def render_conversation(
     conv: ExportConversation,
     messages: List[ExportMessage],
@@ -453,22 +464,17 @@ def render_conversation(
     Returns:
         渲染后的字符串
     """
-    renderers = {
-        "markdown": render_markdown,
-        "json": render_json,
-        "html": render_html,
-    }
-    renderer = renderers.get(fmt)
+    renderer = _RENDERERS.get(fmt)
     if not renderer:
-        raise ValueError(f"Unsupported export format: {fmt}, supported: {list(renderers.keys())}")
+        raise ValueError(f"Unsupported export format: {fmt}, supported: {_SUPPORTED_FORMATS}")
     return renderer(conv, messages)
 
 
 def get_mime_type(fmt: str) -> str:
     """获取导出格式的 MIME 类型"""
-    return {"markdown": "text/markdown", "json": "application/json", "html": "text/html"}.get(fmt, "application/octet-stream")
+    return _MIME_TYPES.get(fmt, "application/octet-stream")
 
 
 def get_file_extension(fmt: str) -> str:
     """获取导出格式的文件扩展名"""
-    return {"markdown": ".md", "json": ".json", "html": ".html"}.get(fmt, ".txt")
+    return _FILE_EXTENSIONS.get(fmt, ".txt")